@@ -10,7 +10,10 @@ backlog = 2048
 
 # Worker Processes
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = "sync"
+# Threaded workers: uploads, job polling and parquet reads are I/O-bound, so each
+# worker serves several requests at once instead of blocking on one
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 50
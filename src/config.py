@@ -10,6 +10,15 @@ import os
 from pathlib import Path
 
 
+def _positive_float_env(name: str, default: float) -> float:
+    """Read a positive float from the environment, falling back to default otherwise"""
+    try:
+        value = float(os.getenv(name, default))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
 class Settings:
     """Simple configuration class with environment variable support"""
     
@@ -29,6 +38,8 @@ class Settings:
     FUTU_HOST = os.getenv('FUTU_HOST', '127.0.0.1')
     FUTU_PORT = int(os.getenv('FUTU_PORT', '11111'))
     FUTU_TIMEOUT = int(os.getenv('FUTU_TIMEOUT', '30'))
+    PRICE_FETCH_WORKERS = int(os.getenv('FUNDMATE_PRICE_WORKERS', '8'))  # Concurrent price lookups
+    PRICE_FETCH_RATE = _positive_float_env('FUNDMATE_PRICE_RATE', 10.0)  # Price lookups started per second
     
     # Processing defaults
     DEFAULT_MAX_WORKERS = 3
@@ -45,6 +56,11 @@ class Settings:
         """Output directory for processed results"""
         return f"{self.OUTPUT_DIR}/result"
     
+    @property
+    def price_cache_file(self) -> str:
+        """SQLite file for persisted (symbol, date) prices"""
+        return f"{self.OUTPUT_DIR}/cache/prices.db"
+    
     def ensure_directories(self) -> None:
         """Create necessary directories if they don't exist"""
         for dir_path in [self.OUTPUT_DIR, self.LOG_DIR, self.pictures_dir, self.result_dir]:
@@ -3,6 +3,7 @@ Data persistence module for broker statement processing results.
 Saves processed broker data using Pandas and Parquet format for efficient storage and analysis.
 """
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Any, Optional
@@ -12,7 +13,13 @@ from loguru import logger
 
 from src.broker_processor import ProcessedResult
 from src.config import settings
-from src.utils import is_money_market_fund, calculate_position_value
+from src.utils import (
+    is_money_market_fund, calculate_position_value_batch, resolve_position_multiplier, validate_date_format
+)
+
+
+# Cash summary columns whose totals are stored in the metadata file
+CASH_TOTAL_COLUMNS = ['cny', 'hkd', 'usd', 'usd_total']
 
 
 class DataPersistence:
@@ -178,7 +185,8 @@ class DataPersistence:
             }
             cash_data.append(cash_row)
             
-            # Extract positions data
+            # Extract positions data; priced rows are valued together after the loop
+            priced_rows, priced_prices, priced_holdings, priced_multipliers, priced_rates = [], [], [], [], []
             for position in result.positions:
                 # Convert holding to integer, handle string values with commas
                 holding_value = position.holding
@@ -188,26 +196,16 @@ class DataPersistence:
                 else:
                     holding_value = int(holding_value)
                 
-                # Calculate USD value using the same logic as print_asset_summary
-                position_value_usd = None
+                # Resolve valuation inputs using the same logic as print_asset_summary
+                valuation = None
                 if position.final_price:
                     try:
-                        position_value, _ = calculate_position_value(
-                            price=position.final_price,
-                            holding=holding_value,
-                            stock_code=position.stock_code,
-                            raw_description=position.raw_description,
-                            broker_multiplier=position.multiplier
+                        multiplier = resolve_position_multiplier(
+                            position.stock_code, position.raw_description, position.multiplier
                         )
-                        
-                        # Convert to USD if needed
                         price_currency = position.optimized_price_currency or 'USD'
-                        if price_currency != 'USD' and position_value != 0:
-                            rate = exchange_rates.get(price_currency, 1.0)
-                            position_value_usd = position_value * rate
-                        else:
-                            position_value_usd = position_value
-                            
+                        rate = 1.0 if price_currency == 'USD' else exchange_rates.get(price_currency, 1.0)
+                        valuation = (float(position.final_price), holding_value, multiplier, rate)
                     except Exception as e:
                         logger.warning(f"Failed to calculate value for {position.stock_code}: {e}")
                 
@@ -232,12 +230,26 @@ class DataPersistence:
                     # Option info
                     'multiplier': position.multiplier or 1,
                     
-                    # Calculated value
-                    'position_value_usd': position_value_usd,
+                    # Calculated value (filled in below for priced rows)
+                    'position_value_usd': None,
                     
                     'timestamp': datetime.now().isoformat()
                 }
                 positions_data.append(position_row)
+                
+                if valuation is not None:
+                    priced_rows.append(position_row)
+                    priced_prices.append(valuation[0])
+                    priced_holdings.append(valuation[1])
+                    priced_multipliers.append(valuation[2])
+                    priced_rates.append(valuation[3])
+            
+            # Value all priced positions of this account at once, then convert to USD
+            if priced_rows:
+                values = calculate_position_value_batch(priced_prices, priced_holdings, priced_multipliers)
+                values_usd = np.where(values != 0, values * np.asarray(priced_rates), values)
+                for position_row, value_usd in zip(priced_rows, values_usd.tolist()):
+                    position_row['position_value_usd'] = value_usd
 
             cash_row = {
                 'date': date,
@@ -364,6 +376,11 @@ class DataPersistence:
         csv_with_summary.to_csv(csv_file, index=False, encoding='utf-8')
         logger.info(f"💾 CSV report exported: {csv_file}")
         
+        # Cash column totals and non-zero account counts, precomputed for the web views
+        cash_amounts = cash_df[CASH_TOTAL_COLUMNS].apply(pd.to_numeric, errors='coerce')
+        cash_totals = {col: float(total) for col, total in cash_amounts.sum().items()}
+        cash_accounts = {col: int(count) for col, count in (cash_amounts.abs() > 0).sum().items()}
+        
         # Save metadata as JSON
         metadata = {
             'date': date,
@@ -371,6 +388,8 @@ class DataPersistence:
             'broker_count': len(results),
             'total_positions': len(positions_data),
             'exchange_rates': exchange_rates,
+            'cash_totals': cash_totals,
+            'cash_accounts': cash_accounts,
             'brokers_processed': [result.broker_name for result in results],
             'files': {
                 'cash_summary': cash_file.name,
@@ -440,6 +459,15 @@ class DataPersistence:
             logger.error(f"Error loading data for date {date}: {e}")
             return None
     
+    def _iter_dates(self):
+        """Yield names of date directories (YYYY-MM-DD) under the output directory"""
+        if not self.base_output_dir.exists():
+            return
+            
+        for item in self.base_output_dir.iterdir():
+            if item.is_dir() and validate_date_format(item.name):
+                yield item.name
+    
     def get_available_dates(self) -> List[str]:
         """
         Get list of available dates with saved data.
@@ -447,20 +475,17 @@ class DataPersistence:
         Returns:
             List[str]: List of date strings in YYYY-MM-DD format
         """
-        if not self.base_output_dir.exists():
-            return []
-            
-        dates = []
-        for item in self.base_output_dir.iterdir():
-            if item.is_dir() and len(item.name) == 10:  # YYYY-MM-DD format
-                try:
-                    # Validate date format
-                    datetime.strptime(item.name, '%Y-%m-%d')
-                    dates.append(item.name)
-                except ValueError:
-                    continue
-                    
-        return sorted(dates)
+        return sorted(self._iter_dates())
+    
+    def get_latest_date(self) -> Optional[str]:
+        """
+        Get the most recent date with saved data, without sorting all dates.
+        
+        Returns:
+            Optional[str]: Latest date string in YYYY-MM-DD format, or None if no data
+        """
+        # ISO dates compare correctly as strings
+        return max(self._iter_dates(), default=None)
 
 
 
@@ -5,39 +5,57 @@ Handles API calls, caching, and currency conversion
 """
 
 import json
+import os
+import threading
 import time
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
 from loguru import logger
 import requests
+import pyarrow as pa
+from pyarrow import feather
 
 from src.config import settings
 
 
 class ExchangeRateHandler:
     """
-    Centralized exchange rate management with JSON file caching
+    Centralized exchange rate management with file caching
+
+    The cache file format follows its extension: Feather (.feather, default)
+    with columns (from_ccy, to_ccy, date, rate), or the legacy flat JSON
+    {"FROM_TO_DATE": rate}. A missing Feather cache is seeded from a
+    sibling .json file so existing caches carry over.
     """
     
-    def __init__(self, cache_file: str = './out/exchange_rates_cache.json'):
+    def __init__(self, cache_file: str = './out/exchange_rates_cache.feather'):
         self.cache_file = Path(cache_file)
         self._rate_cache = {}  # Memory cache: {(from_curr, to_curr, date): rate}
+        self._file_cache = None  # Parsed cache file, loaded on first use
+        # Serializes cache lookups, API fetches and cache file writes, so broker
+        # runs on several threads share one fetch per rate and respect the API delay
+        self._lock = threading.RLock()
     
     def get_single_rate(self, from_currency: str, to_currency: str, date: str) -> float:
         """Get single exchange rate with dual-layer caching"""
+        with self._lock:
+            return self._get_single_rate(from_currency, to_currency, date)
+    
+    def _get_single_rate(self, from_currency: str, to_currency: str, date: str) -> float:
+        """get_single_rate body; caller holds self._lock"""
         # Check memory cache first
         cache_key = (from_currency, to_currency, date)
         if cache_key in self._rate_cache:
             logger.debug(f"Using memory cached rate: {from_currency}→{to_currency} = {self._rate_cache[cache_key]}")
             return self._rate_cache[cache_key]
         
-        # Check JSON file cache
+        # Check file cache
         rate = self._load_rate_from_json(from_currency, to_currency, date)
         if rate is not None:
             # Store in memory cache too
             self._rate_cache[cache_key] = rate
-            logger.debug(f"Using JSON cached rate: {from_currency}→{to_currency} = {rate}")
+            logger.debug(f"Using file cached rate: {from_currency}→{to_currency} = {rate}")
             return rate
         
         # Not in cache, fetch from API
@@ -55,7 +73,7 @@ class ExchangeRateHandler:
                 if rate is None or rate <= 0:
                     raise ValueError(f"Invalid exchange rate received: {rate}")
                 
-                # Cache in both memory and JSON file
+                # Cache in both memory and cache file
                 self._rate_cache[cache_key] = rate
                 self._save_rate_to_json(from_currency, to_currency, date, rate)
                 logger.info(f"Fetched and cached rate: {from_currency}→{to_currency} = {rate}")
@@ -147,48 +165,89 @@ class ExchangeRateHandler:
         logger.warning(f"No exchange rate found for {currency}, using 1:1 conversion (may be inaccurate)")
         return amount
 
-    def _load_rate_from_json(self, from_currency: str, to_currency: str, date: str) -> Optional[float]:
-        """Load exchange rate from JSON cache file"""
+    def _is_feather(self) -> bool:
+        """Whether the cache file uses the Feather format"""
+        return self.cache_file.suffix == '.feather'
+
+    @staticmethod
+    def _read_json(path: Path) -> Dict[tuple, float]:
+        """Read a legacy flat JSON cache file"""
+        with open(path, 'r') as f:
+            cache_data = json.load(f)
+        return {tuple(key.split('_', 2)): rate for key, rate in cache_data.items()}
+
+    def _read_cache_file(self) -> Dict[tuple, float]:
+        """Read the cache file into {(from_curr, to_curr, date): rate} (empty if missing)"""
+        if not self._is_feather():
+            return self._read_json(self.cache_file) if self.cache_file.exists() else {}
+
         if not self.cache_file.exists():
-            return None
-            
+            legacy_file = self.cache_file.with_suffix('.json')
+            return self._read_json(legacy_file) if legacy_file.exists() else {}
+
+        table = feather.read_table(self.cache_file)
+        columns = [table.column(name).to_pylist() for name in ('from_ccy', 'to_ccy', 'date', 'rate')]
+        return dict(zip(zip(*columns[:3]), columns[3]))
+
+    def _write_cache_file(self, cache_data: Dict[tuple, float]) -> None:
+        """Write {(from_curr, to_curr, date): rate} to the cache file (atomically replaced)"""
+        tmp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
         try:
-            with open(self.cache_file, 'r') as f:
-                cache_data = json.load(f)
-            
-            # Create cache key
-            key = f"{from_currency}_{to_currency}_{date}"
-            return cache_data.get(key)
-            
-        except Exception as e:
-            logger.debug(f"Failed to load from JSON cache: {e}")
-            return None
+            self._write_cache_data(cache_data, tmp_file)
+            os.replace(tmp_file, self.cache_file)
+        finally:
+            tmp_file.unlink(missing_ok=True)
+
+    def _write_cache_data(self, cache_data: Dict[tuple, float], path: Path) -> None:
+        """Serialize the cache in the cache file's format to path"""
+        if not self._is_feather():
+            with open(path, 'w') as f:
+                json.dump({'_'.join(key): rate for key, rate in cache_data.items()},
+                          f, indent=2, sort_keys=True)
+            return
+
+        keys = sorted(cache_data)
+        table = pa.table({
+            'from_ccy': pa.array([k[0] for k in keys], pa.string()),
+            'to_ccy': pa.array([k[1] for k in keys], pa.string()),
+            'date': pa.array([k[2] for k in keys], pa.string()),
+            'rate': pa.array([cache_data[k] for k in keys], pa.float64()),
+        })
+        feather.write_feather(table, str(path), compression='uncompressed')
+
+    def _load_file_cache(self) -> Dict[tuple, float]:
+        """Return the cache file contents, parsing the file only once"""
+        with self._lock:
+            if self._file_cache is None:
+                try:
+                    self._file_cache = self._read_cache_file()
+                except Exception as e:
+                    logger.debug(f"Failed to load from cache file: {e}")
+                    self._file_cache = {}
+            return self._file_cache
+
+    def _load_rate_from_json(self, from_currency: str, to_currency: str, date: str) -> Optional[float]:
+        """Load exchange rate from the cache file"""
+        return self._load_file_cache().get((from_currency, to_currency, date))
     
     def _save_rate_to_json(self, from_currency: str, to_currency: str, date: str, rate: float) -> None:
-        """Save exchange rate to JSON cache file"""
+        """Save exchange rate to the cache file"""
         # Create out directory if it doesn't exist
         self.cache_file.parent.mkdir(parents=True, exist_ok=True)
         
         try:
-            # Load existing data
-            if self.cache_file.exists():
-                with open(self.cache_file, 'r') as f:
-                    cache_data = json.load(f)
-            else:
-                cache_data = {}
-            
-            # Add new rate
-            key = f"{from_currency}_{to_currency}_{date}"
-            cache_data[key] = rate
-            
-            # Save back to file
-            with open(self.cache_file, 'w') as f:
-                json.dump(cache_data, f, indent=2, sort_keys=True)
+            # Re-read the file so rates saved by other processes are kept; the lock
+            # keeps concurrent broker runs in this process from losing each other's rates
+            with self._lock:
+                cache_data = self._read_cache_file()
+                cache_data[(from_currency, to_currency, date)] = rate
+                self._write_cache_file(cache_data)
+                self._file_cache = cache_data
             
-            logger.debug(f"Saved rate to JSON cache: {key} = {rate}")
+            logger.debug(f"Saved rate to cache file: {from_currency}_{to_currency}_{date} = {rate}")
             
         except Exception as e:
-            logger.warning(f"Failed to save to JSON cache: {e}")
+            logger.warning(f"Failed to save to cache file: {e}")
 
     def get_cache_stats(self) -> Dict[str, int]:
         """Get statistics about cached rates"""
@@ -198,25 +257,25 @@ class ExchangeRateHandler:
         }
         
         if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r') as f:
-                    cache_data = json.load(f)
-                stats['json_cache_size'] = len(cache_data)
-            except:
-                pass
+            stats['json_cache_size'] = len(self._load_file_cache())
         
         return stats
 
     def clear_cache(self, memory_only: bool = False) -> None:
         """Clear exchange rate cache"""
-        # Clear memory cache
-        self._rate_cache.clear()
-        logger.info("Cleared memory exchange rate cache")
-        
-        # Clear JSON cache if requested
-        if not memory_only and self.cache_file.exists():
-            self.cache_file.unlink()
-            logger.info("Cleared JSON exchange rate cache file")
+        with self._lock:
+            # Clear memory cache
+            self._rate_cache.clear()
+            logger.info("Cleared memory exchange rate cache")
+            
+            # Clear cache file if requested
+            if not memory_only:
+                legacy_file = self.cache_file.with_suffix('.json') if self._is_feather() else None
+                for path in (self.cache_file, legacy_file):
+                    if path is not None and path.exists():
+                        path.unlink()
+                        logger.info(f"Cleared exchange rate cache file {path}")
+                self._file_cache = None
 
 
 # Global instance for easy access
@@ -5,19 +5,26 @@ Main entry point with command-line interface for processing broker statements.
 
 import sys
 import argparse
+import threading
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from loguru import logger
 
-from src.broker_processor import BrokerStatementProcessor
+from src.broker_processor import BrokerStatementProcessor, ProcessedResult
 from src.data_persistence import save_processing_results
 from src.utils import validate_broker_folder, print_processing_info, ensure_output_directories
 from src.config import settings
+from src.price_cache import PriceCache
 from src.trade_confirmation_processor import (
     TradeConfirmationProcessor, 
     auto_detect_latest_base_date
 )
 
 
+# Serializes writes to the per-date result directory
+_save_lock = threading.Lock()
+
+
 def infer_base_date_from_broker_folder(broker_folder: str, target_date: str) -> str:
     """
     Infer base_date from broker_folder path.
@@ -164,28 +171,68 @@ Examples:
         help='Trade confirmation folder path (default: data/archives/TC)'
     )
     
+    parser.add_argument(
+        '--no-price-cache',
+        dest='use_price_cache',
+        action='store_false',
+        help='Fetch every TC price instead of reusing prices cached by earlier runs'
+    )
+    
+    parser.add_argument(
+        '--clear-price-cache',
+        action='store_true',
+        help='Delete the persisted TC price cache before processing'
+    )
+    
     return parser
 
 
-def main():
-    """
-    Main entry point for the FundMate broker statement processor.
-    Handles command-line arguments and orchestrates the processing workflow.
+def collect_results(
+    broker_folder: str,
+    date: str,
+    broker: Optional[str] = None,
+    output: Optional[str] = None,
+    force: bool = False,
+    max_workers: int = 10,
+    use_tc: bool = False,
+    tc_folder: str = 'data/archives/TC',
+    use_price_cache: bool = True
+) -> Tuple[List[ProcessedResult], Dict[str, float], Optional[str]]:
     """
-    # Parse command-line arguments
-    parser = create_argument_parser()
-    args = parser.parse_args()
+    Process broker statements (or apply trade confirmations) without saving.
+    Safe to call from several threads at once (e.g. one per broker in the web app);
+    callers combine the results and persist them once with save_results().
+    Failures are raised to the caller instead of exiting the process.
+    
+    Args:
+        broker_folder: Path to the folder containing broker statements
+        date: Date for processing in YYYY-MM-DD format
+        broker: Specific broker to process (None = all brokers)
+        output: Output folder for converted images (default: settings.pictures_dir)
+        force: Force re-conversion of PDFs even if images already exist
+        max_workers: Maximum number of concurrent threads for broker processing
+        use_tc: Use trade confirmation mode for incremental portfolio update
+        tc_folder: Trade confirmation folder path
+        use_price_cache: Reuse TC prices cached by earlier runs
     
+    Raises:
+        FileNotFoundError: If the broker folder does not exist
+        ValueError: If the TC base date cannot be inferred from the broker folder
+        RuntimeError: If statement processing fails
+    
+    Returns:
+        Tuple of (processed results, exchange rates, result date)
+    """
     # Setup configuration and ensure directories
-    if args.output is None:
-        args.output = settings.pictures_dir
+    if output is None:
+        output = settings.pictures_dir
     settings.ensure_directories()
     
     # Check if using Trade Confirmation mode
-    if args.use_tc:
+    if use_tc:
         # Initialize logging to target date (not base date)
         from utils import setup_logging
-        setup_logging(settings.LOG_DIR, args.date)
+        setup_logging(settings.LOG_DIR, date)
         
         logger.info("=" * 60)
         logger.info("Trade Confirmation Mode (End-to-End)")
@@ -193,81 +240,93 @@ def main():
         
         try:
             base_date = infer_base_date_from_broker_folder(
-                args.broker_folder, 
-                args.date
+                broker_folder, 
+                date
             )
         except ValueError as e:
             logger.error(str(e))
-            sys.exit(1)
+            raise
     
-        logger.info(f"Broker Folder: {args.broker_folder}")
+        logger.info(f"Broker Folder: {broker_folder}")
         logger.info(f"Base Date: {base_date}")
-        logger.info(f"Target Date: {args.date}")
-        logger.info(f"TC Folder: {args.tc_folder}")
+        logger.info(f"Target Date: {date}")
+        logger.info(f"TC Folder: {tc_folder}")
         
         # Process with trade confirmations (end-to-end mode)
         try:
-            tc_processor = TradeConfirmationProcessor()
+            tc_processor = TradeConfirmationProcessor(use_price_cache=use_price_cache)
             processed_results, exchange_rates, date = tc_processor.process_with_trade_confirmation(
-                base_broker_folder=args.broker_folder,
+                base_broker_folder=broker_folder,
                 base_date=base_date,
-                target_date=args.date,
-                tc_folder=args.tc_folder
+                target_date=date,
+                tc_folder=tc_folder
             )
         except Exception as e:
             logger.error(f"Trade confirmation processing failed: {e}")
             import traceback
             traceback.print_exc()
-            sys.exit(1)
+            raise RuntimeError(f"Trade confirmation processing failed: {e}") from e
     
     else:
         # Normal mode: Process broker statements
         
         # Validate broker folder exists
-        if not validate_broker_folder(args.broker_folder):
-            print(f"ERROR: PDF folder does not exist: {args.broker_folder}")
-            print("Please check the path and try again.")
-            sys.exit(1)
+        if not validate_broker_folder(broker_folder):
+            raise FileNotFoundError(f"PDF folder does not exist: {broker_folder}")
         
         # Display processing information
         print_processing_info(
-            broker_folder=args.broker_folder,
-            date=args.date,
-            broker=args.broker,
-            output=args.output,
-            force=args.force
+            broker_folder=broker_folder,
+            date=date,
+            broker=broker,
+            output=output,
+            force=force
         )
         
         # Process broker statements
         try:
             processor = BrokerStatementProcessor()
             processed_results, exchange_rates, date = processor.process_folder(
-                broker_folder=args.broker_folder,
-                image_output_folder=args.output,
-                date=args.date,
-                broker=args.broker,
-                force=args.force,
-                max_workers=args.max_workers
+                broker_folder=broker_folder,
+                image_output_folder=output,
+                date=date,
+                broker=broker,
+                force=force,
+                max_workers=max_workers
             )
         except Exception as e:
             logger.error(f"Broker statement processing failed: {e}")
             import traceback
             traceback.print_exc()
-            sys.exit(1)
+            raise RuntimeError(f"Broker statement processing failed: {e}") from e
     
-    # Save results to persistent storage (common for both modes)
+    return processed_results, exchange_rates, date
+
+
+def save_results(
+    processed_results: List[ProcessedResult],
+    exchange_rates: Dict[str, float],
+    date: Optional[str]
+) -> None:
+    """
+    Save processed results to the per-date result directory.
+    
+    Each save replaces that date's files, so results for one date must be
+    combined before saving; concurrent saves are serialized.
+    """
     if processed_results and exchange_rates and date:
         logger.info("Saving processed data to persistent storage...")
         try:
             # Use configured result directory
             result_output_dir = Path(settings.result_dir)
             
-            saved_files = save_processing_results(
-                results=processed_results, 
-                date=date, 
-                exchange_rates=exchange_rates,
-                output_dir=str(result_output_dir)
-            )
+            with _save_lock:
+                saved_files = save_processing_results(
+                    results=processed_results, 
+                    date=date, 
+                    exchange_rates=exchange_rates,
+                    output_dir=str(result_output_dir)
+                )
             logger.success(f"Data persistence completed. Files saved: {list(saved_files.keys())}")
         except Exception as e:
             logger.error(f"Failed to save processed data: {e}")
@@ -275,5 +334,57 @@ def main():
         logger.warning("No data to save - processing may have failed")
 
 
+def run_processing(
+    broker_folder: str,
+    date: str,
+    broker: Optional[str] = None,
+    output: Optional[str] = None,
+    force: bool = False,
+    max_workers: int = 10,
+    use_tc: bool = False,
+    tc_folder: str = 'data/archives/TC',
+    use_price_cache: bool = True
+) -> None:
+    """
+    Run the processing workflow with explicit parameters and save the results.
+    See collect_results() for the arguments and raised exceptions.
+    """
+    save_results(*collect_results(
+        broker_folder=broker_folder,
+        date=date,
+        broker=broker,
+        output=output,
+        force=force,
+        max_workers=max_workers,
+        use_tc=use_tc,
+        tc_folder=tc_folder,
+        use_price_cache=use_price_cache
+    ))
+
+
+
+def main():
+    """
+    Main entry point for the FundMate broker statement processor.
+    Handles command-line arguments and orchestrates the processing workflow.
+    """
+    # Parse command-line arguments
+    parser = create_argument_parser()
+    args = vars(parser.parse_args())
+    
+    if args.pop('clear_price_cache'):
+        PriceCache(settings.price_cache_file).clear()
+    
+    try:
+        run_processing(**args)
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}")
+        print("Please check the path and try again.")
+        sys.exit(1)
+    except (ValueError, RuntimeError):
+        # Already logged by run_processing
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
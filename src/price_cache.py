@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Price Cache - Persistent (symbol, date) -> price store backed by SQLite
+
+Closing prices for past dates never change, so once fetched they can be
+reused across runs instead of hitting Futu again.
+"""
+
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+
+# Keep IN (...) lists well below SQLite's bound-variable limit
+_QUERY_CHUNK = 500
+
+
+class PriceCache:
+    """
+    Persistent price cache keyed by (symbol, date)
+    """
+
+    def __init__(self, db_file: str = './out/cache/prices.db'):
+        self.db_file = Path(db_file)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache database, creating the table on first use"""
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_file)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS prices ("
+            "symbol TEXT NOT NULL, date TEXT NOT NULL, price REAL NOT NULL, "
+            "currency TEXT NOT NULL, source TEXT, fetched_at REAL NOT NULL, "
+            "PRIMARY KEY (symbol, date))"
+        )
+        return conn
+
+    def get_many(
+        self,
+        symbols: Iterable[str],
+        date: str,
+        max_age_seconds: Optional[float] = None
+    ) -> Dict[str, Tuple[float, str, str]]:
+        """
+        Look up cached prices for several symbols on one date
+
+        Args:
+            symbols: Symbols to look up
+            date: Price date (YYYY-MM-DD)
+            max_age_seconds: Ignore entries fetched longer ago than this (None = never expire)
+
+        Returns:
+            Dict mapping symbol to (price, currency, source) for cache hits only
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+
+        min_fetched_at = time.time() - max_age_seconds if max_age_seconds is not None else 0.0
+        hits = {}
+        try:
+            with closing(self._connect()) as conn:
+                for start in range(0, len(symbols), _QUERY_CHUNK):
+                    chunk = symbols[start:start + _QUERY_CHUNK]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT symbol, price, currency, source FROM prices "
+                        f"WHERE date = ? AND fetched_at >= ? AND symbol IN ({placeholders})",
+                        [date, min_fetched_at, *chunk]
+                    )
+                    for symbol, price, currency, source in rows:
+                        hits[symbol] = (price, currency, source)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read price cache {self.db_file}: {e}")
+            return {}
+
+        return hits
+
+    def put_many(self, date: str, rows: List[Tuple[str, float, str, str]]) -> None:
+        """
+        Store fetched prices
+
+        Args:
+            date: Price date (YYYY-MM-DD)
+            rows: List of (symbol, price, currency, source)
+        """
+        if not rows:
+            return
+
+        fetched_at = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO prices "
+                    "(symbol, date, price, currency, source, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(symbol, date, price, currency, source, fetched_at)
+                     for symbol, price, currency, source in rows]
+                )
+            logger.debug(f"Saved {len(rows)} prices to cache for {date}")
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write price cache {self.db_file}: {e}")
+
+    def clear(self) -> None:
+        """Delete the cache database"""
+        if self.db_file.exists():
+            self.db_file.unlink()
+            logger.info("Cleared price cache file")
@@ -105,7 +105,41 @@ def get_price_futu(symbol: str, date: str) -> Optional[float]:
                 pass
 
 
-def get_stock_price(symbol: str, date: str, source: str = None, raw_description: str = None) -> tuple[Optional[float], Optional[str]]:
+def _looks_like_option(description: str) -> bool:
+    """
+    Unified option detection (consistent with is_option_contract in utils.py)
+    
+    Supports full keywords (CALL/PUT/OPTION), space+letter (C/P), and letter+digits (P41, C300)
+    """
+    upper_desc = description.upper()
+    return bool(
+        any(keyword in upper_desc for keyword in ['OPTION', 'CALL', 'PUT']) or
+        upper_desc.endswith(' C') or upper_desc.endswith(' P') or
+        re.search(r'[\s][CP]\d+', upper_desc)  # Matches " P41", " C300", etc.
+    )
+
+
+def _looks_like_us_option(description: str) -> bool:
+    """
+    Detect US option descriptions
+    
+    Format 1: "AMZN US 06/18/26 C300"
+    Format 2: "AMZN 18JUN26 300 C" (IB format)
+    """
+    return bool(
+        'US' in description.upper() or
+        re.search(r'\d{2}/\d{2}/\d{2}', description) or  # MM/DD/YY format
+        re.search(r'\d{2}[A-Z]{3}\d{2}', description)    # DDMMMYY format (IB)
+    )
+
+
+def is_us_option_description(description: str) -> bool:
+    """Whether get_stock_price would route this description to the US option API"""
+    return bool(description) and _looks_like_option(description) and _looks_like_us_option(description)
+
+
+def get_stock_price(symbol: str, date: str, source: str = None, raw_description: str = None,
+                    try_us_option: bool = True) -> tuple[Optional[float], Optional[str]]:
     """
     Get stock price for given symbol and date
     
@@ -114,6 +148,8 @@ def get_stock_price(symbol: str, date: str, source: str = None, raw_description:
         date: Date string YYYY-MM-DD
         source: Override source ("akshare", "futu"), or None to use config
         raw_description: Optional raw description for better option parsing
+        try_us_option: Set False when the US option lookup was already attempted
+            (e.g. via fetch_us_option_close) to skip it here
     
     Returns:
         Tuple of (price, currency) where:
@@ -124,26 +160,9 @@ def get_stock_price(symbol: str, date: str, source: str = None, raw_description:
     # Option detection and processing - minimal implementation
     description = raw_description or symbol
     
-    # Unified option detection (consistent with is_option_contract in utils.py)
-    # Support full keywords (CALL/PUT/OPTION), space+letter (C/P), and letter+digits (P41, C300)
-    upper_desc = description.upper()
-    is_option = (
-        any(keyword in upper_desc for keyword in ['OPTION', 'CALL', 'PUT']) or
-        upper_desc.endswith(' C') or upper_desc.endswith(' P') or
-        re.search(r'[\s][CP]\d+', upper_desc)  # Matches " P41", " C300", etc.
-    )
-    
-    if is_option:
+    if _looks_like_option(description):
         # Try US option format first (support multiple formats)
-        # Format 1: "AMZN US 06/18/26 C300"
-        # Format 2: "AMZN 18JUN26 300 C" (IB format)
-        is_us_option = (
-            'US' in description.upper() or
-            re.search(r'\d{2}/\d{2}/\d{2}', description) or  # MM/DD/YY format
-            re.search(r'\d{2}[A-Z]{3}\d{2}', description)    # DDMMMYY format (IB)
-        )
-        
-        if is_us_option:
+        if try_us_option and _looks_like_us_option(description):
             price, _ = get_us_option_price_from_futu(symbol, description, date)
             if price:
                 return (price, 'USD')  # US option API returns USD
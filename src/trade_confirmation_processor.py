@@ -7,16 +7,21 @@ All comments in English as per requirement.
 
 from dataclasses import dataclass
 from typing import List, Dict, Tuple, Optional
+import asyncio
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from loguru import logger
 import re
+import time
 from datetime import datetime
 import copy
 
 from src.broker_processor import ProcessedResult
-from src.price_fetcher import PriceFetcher, get_stock_price
+from src.price_fetcher import PriceFetcher, get_stock_price, is_us_option_description
+from src.us_option_price_helper import fetch_us_option_close
 from src.data_persistence import DataPersistence
+from src.price_cache import PriceCache
 from src.exchange_rate_handler import exchange_handler
 from src.config import settings
 from src.enums import PositionContext, OptionType
@@ -24,6 +29,32 @@ from src.position import Position
 from src.option_parser import parse_option
 
 
+# Low-cardinality TC columns: read as categoricals so string normalization
+# runs once per distinct value instead of once per row
+TC_CATEGORY_DTYPES = {
+    'Broker': 'category',
+    'Currency': 'category',
+    'BUY/SELL': 'category',
+}
+
+# Extra attempts for a price lookup that raises (backoff: 1s, 2s, ... capped)
+PRICE_FETCH_RETRIES = 2
+PRICE_FETCH_BACKOFF_MAX = 10
+
+# Cached prices for today (or later) expire after this many seconds
+PRICE_CACHE_TODAY_TTL = 3600
+
+# Position init argument -> (Position.to_dict() key, default) for raw dict entries
+_POSITION_DICT_KEYS = {
+    'stock_code': ('StockCode', ''),
+    'holding': ('Holding', 0),
+    'broker_price': ('BrokerPrice', None),
+    'price_currency': ('PriceCurrency', None),
+    'raw_description': ('RawDescription', None),
+    'multiplier': ('Multiplier', None),
+}
+
+
 @dataclass
 class Transaction:
     """
@@ -41,6 +72,84 @@ class Transaction:
     market: str            # Market/Exchange (HK, US, etc.)
 
 
+def _get_price(symbol: str, target_date: str, raw_description: str) -> Tuple[Optional[float], Optional[str]]:
+    """
+    get_stock_price, except that US option lookups raise on Futu errors
+    
+    The US option close is looked up directly so a dropped Futu connection
+    surfaces to the retry loop in _fetch_prices instead of reading as a miss.
+    
+    Returns:
+        Tuple of (price, currency), (None, None) if no price was found
+    """
+    description = raw_description or symbol
+    is_us_option = is_us_option_description(description)
+    if is_us_option:
+        price, _ = fetch_us_option_close(description, target_date)
+        if price:
+            return (price, 'USD')  # US option API returns USD
+    return get_stock_price(symbol, target_date, None, raw_description, try_us_option=not is_us_option)
+
+
+class _TokenBucket:
+    """
+    Async token bucket: allows bursts up to max(1, rate) calls, refilled at `rate` per second.
+    Only used from a single event loop, so no locking is needed.
+    """
+    
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        self.rate = rate
+        # Rates below 1/s still need room for one whole token
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    async def acquire(self) -> None:
+        """Wait until a token is available, then take it"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class _HoldingRows:
+    """
+    Maps live Position objects to rows of the staged holdings array.
+    
+    Rows come from a monotonic counter and are dropped when a position is
+    removed, so a new position that reuses a freed object's id() never
+    inherits its row.
+    """
+    
+    def __init__(self):
+        self._rows: Dict[int, int] = {}
+        self._next_row = 0
+    
+    def __len__(self) -> int:
+        return self._next_row
+    
+    def __getitem__(self, position: Position) -> int:
+        return self._rows[id(position)]
+    
+    def add(self, position: Position) -> int:
+        """Register a position (once) and return its row"""
+        row = self._rows.get(id(position))
+        if row is None:
+            row = self._rows[id(position)] = self._next_row
+            self._next_row += 1
+        return row
+    
+    def discard(self, position: Position) -> None:
+        """Forget a position that has been removed from the portfolio"""
+        self._rows.pop(id(position), None)
+
+
 class TradeConfirmationProcessor:
     """
     Trade Confirmation Processor - Incremental Portfolio Update
@@ -49,11 +158,21 @@ class TradeConfirmationProcessor:
     from a base date to a target date.
     """
     
-    def __init__(self):
-        """Initialize processor with existing components"""
+    def __init__(self, use_price_cache: bool = True, price_cache: Optional[PriceCache] = None):
+        """
+        Initialize processor with existing components
+        
+        Args:
+            use_price_cache: Reuse prices persisted by earlier runs (False always fetches)
+            price_cache: Cache to use instead of the one at settings.price_cache_file
+        """
         self.price_fetcher = PriceFetcher()
         self.persistence = DataPersistence()
         self.price_failures = []  # Track failed price fetches
+        if not use_price_cache:
+            self.price_cache = None
+        else:
+            self.price_cache = price_cache or PriceCache(settings.price_cache_file)
         self._hk_code_cache: Dict[str, str] = {}
         self._option_parser_configured = False
     
@@ -461,17 +580,17 @@ class TradeConfirmationProcessor:
         """
         try:
             # Try reading normally first
-            df = pd.read_excel(file_path)
+            df = pd.read_excel(file_path, dtype=TC_CATEGORY_DTYPES)
             
             # Check if first row contains column names (header in first data row)
             if 'Unnamed' in str(df.columns[0]):
                 # Try header=1 first (common for US TC files)
-                df_header1 = pd.read_excel(file_path, header=1)
+                df_header1 = pd.read_excel(file_path, header=1, dtype=TC_CATEGORY_DTYPES)
                 if 'Trade Date' in df_header1.columns:
                     df = df_header1
                 else:
                     # Fallback to header=0 and check first row
-                    df = pd.read_excel(file_path, header=0)
+                    df = pd.read_excel(file_path, header=0, dtype=TC_CATEGORY_DTYPES)
                     if len(df) > 0 and df.iloc[0].astype(str).str.contains('Trade Date', na=False).any():
                         df = df.iloc[1:].reset_index(drop=True)
             
@@ -494,6 +613,12 @@ class TradeConfirmationProcessor:
                     f"Please fix the Excel file format before processing.\n"
                 )
             
+            # Normalize direction per category: remove spaces (e.g., "BUY COVER" -> "BUYCOVER")
+            df['BUY/SELL'] = df['BUY/SELL'].astype('category').map(
+                lambda value: str(value).strip().upper().replace(' ', ''),
+                na_action=None
+            )
+            
             transactions = []
             
             for _, row in df.iterrows():
@@ -504,8 +629,7 @@ class TradeConfirmationProcessor:
                 # Use Trade Date from Excel, not filename date
                 trade_date = pd.to_datetime(row['Trade Date']).strftime('%Y-%m-%d')
                 
-                # Normalize direction: remove spaces (e.g., "BUY COVER" -> "BUYCOVER")
-                direction = str(row['BUY/SELL']).strip().upper().replace(' ', '')
+                direction = str(row['BUY/SELL'])
                 
                 # Clean stock code: remove Bloomberg suffixes
                 stock_code = str(row['Stock Code']).strip()
@@ -624,20 +748,19 @@ class TradeConfirmationProcessor:
         fallback_dt = datetime.strptime(fallback_base_date, '%Y-%m-%d')
         inclusive_start_brokers = {'LB'}
         
-        # Group transactions by broker (case-insensitive)
-        broker_txns = {}
-        for txn in transactions:
-            broker_key = txn.broker.strip().upper()  # Normalize to uppercase
-            if broker_key not in broker_txns:
-                broker_txns[broker_key] = []
-            broker_txns[broker_key].append(txn)
+        # Group transactions by broker (case-insensitive) in a single pass
+        txn_df = pd.DataFrame({
+            'broker_key': [txn.broker.strip().upper() for txn in transactions],
+            'date': pd.to_datetime([txn.date for txn in transactions], format='%Y-%m-%d'),
+        })
+        broker_rows = txn_df.groupby('broker_key', sort=False).indices
         
         # Apply transactions to each broker (case-insensitive matching)
         for result in base_results:
             broker_key = result.broker_name.strip().upper()  # Normalize to uppercase
             
-            if broker_key in broker_txns:
-                txns = broker_txns[broker_key]
+            if broker_key in broker_rows:
+                rows = broker_rows[broker_key]
                 statement_dt = broker_statement_dates.get(broker_key, fallback_dt)
                 if statement_dt > target_dt:
                     logger.warning(
@@ -647,15 +770,12 @@ class TradeConfirmationProcessor:
                     continue
 
                 inclusive_start = broker_key in inclusive_start_brokers
-                filtered_txns = []
-                for txn in txns:
-                    txn_dt = datetime.strptime(txn.date, '%Y-%m-%d')
-                    if inclusive_start:
-                        in_range = statement_dt <= txn_dt <= target_dt
-                    else:
-                        in_range = statement_dt < txn_dt <= target_dt
-                    if in_range:
-                        filtered_txns.append(txn)
+                txn_dates = txn_df['date'].iloc[rows]
+                if inclusive_start:
+                    in_range = (txn_dates >= statement_dt) & (txn_dates <= target_dt)
+                else:
+                    in_range = (txn_dates > statement_dt) & (txn_dates <= target_dt)
+                filtered_txns = [transactions[i] for i in rows[in_range.to_numpy()]]
 
                 if not filtered_txns:
                     logger.debug(
@@ -683,10 +803,27 @@ class TradeConfirmationProcessor:
         """
         Apply transactions to a single broker's portfolio.
         
+        Holdings are staged in a float64 array (one row per position) for the
+        duration of the apply phase and written back once at the end. New
+        positions still go through the object path and get a fresh row.
+        
         Args:
             result: ProcessedResult to update (modified in-place)
             transactions: Transactions for this broker
         """
+        positions = result.positions
+        for idx, pos in enumerate(positions):
+            positions[idx] = self._ensure_position_object(pos, result.broker_name)
+        
+        rows = _HoldingRows()
+        for pos in positions:
+            rows.add(pos)
+        # Every transaction can add at most one position, so size the array once
+        holdings = np.zeros(len(rows) + len(transactions), dtype=np.float64)
+        for pos in positions:
+            holdings[rows[pos]] = self._normalize_holding(pos.holding)
+        dirty = set()
+        
         for txn in transactions:
             # Normalize SELLSHORT to SELL (both handled by _apply_sell)
             direction = txn.direction
@@ -695,9 +832,9 @@ class TradeConfirmationProcessor:
             
             if direction in ('BUY', 'BUYCOVER'):
                 # BUYCOVER is treated as BUY (covering short position)
-                self._apply_buy(result, txn)
+                self._apply_buy(result, txn, holdings, rows, dirty)
             elif direction == 'SELL':
-                self._apply_sell(result, txn)
+                self._apply_sell(result, txn, holdings, rows, dirty)
             else:
                 raise ValueError(
                     f"Unknown transaction direction: '{txn.direction}'\n"
@@ -707,16 +844,30 @@ class TradeConfirmationProcessor:
                     f"Supported directions: BUY, BUYCOVER, SELL, SELLSHORT\n"
                     f"Please check the 'BUY/SELL' column in the TC file."
                 )
+        
+        # Write staged holdings back to the surviving positions
+        for pos in result.positions:
+            row = rows[pos]
+            if row in dirty:
+                pos.holding = float(holdings[row])
     
-    def _apply_buy(self, result: ProcessedResult, txn: Transaction):
+    def _apply_buy(
+        self,
+        result: ProcessedResult,
+        txn: Transaction,
+        holdings: np.ndarray,
+        rows: '_HoldingRows',
+        dirty: set
+    ):
         """
         Apply a BUY transaction: increase position, decrease cash.
         """
         position = self._find_position(result.positions, txn.stock_code, result.broker_name)
         
         if position:
-            current_holding = self._normalize_holding(position.holding)
-            position.holding = current_holding + txn.quantity
+            row = rows[position]
+            holdings[row] += txn.quantity
+            dirty.add(row)
         else:
             new_position = Position(
                 stock_code=txn.stock_code,
@@ -728,6 +879,7 @@ class TradeConfirmationProcessor:
                 context=PositionContext.TC
             )
             result.positions.append(new_position)
+            holdings[rows.add(new_position)] = txn.quantity
             logger.debug(
                 f"  Created new position with multiplier={new_position.multiplier} "
                 f"for {txn.stock_code}"
@@ -738,7 +890,14 @@ class TradeConfirmationProcessor:
         result.usd_total = result.usd_total - txn.amount_usd
         logger.debug(f"  BUY {txn.quantity} {txn.stock_code} @ ${txn.avg_price}")
     
-    def _apply_sell(self, result: ProcessedResult, txn: Transaction):
+    def _apply_sell(
+        self,
+        result: ProcessedResult,
+        txn: Transaction,
+        holdings: np.ndarray,
+        rows: '_HoldingRows',
+        dirty: set
+    ):
         """
         Apply a SELL transaction: decrease position OR create short position, increase cash.
         """
@@ -749,8 +908,9 @@ class TradeConfirmationProcessor:
             abs_quantity = abs(txn.quantity)
             
             if position:
-                current_holding = self._normalize_holding(position.holding)
-                position.holding = current_holding - abs_quantity
+                row = rows[position]
+                holdings[row] -= abs_quantity
+                dirty.add(row)
             else:
                 new_position = Position(
                     stock_code=txn.stock_code,
@@ -762,6 +922,7 @@ class TradeConfirmationProcessor:
                     context=PositionContext.TC
                 )
                 result.positions.append(new_position)
+                holdings[rows.add(new_position)] = -abs_quantity
                 logger.debug(
                     f"  Created new short position with multiplier={new_position.multiplier} "
                     f"for {txn.stock_code}"
@@ -787,23 +948,30 @@ class TradeConfirmationProcessor:
                     f"\nNote: For short sales, quantity should be negative (e.g., -500)"
                 )
             
-            current_holding = self._normalize_holding(position.holding)
+            row = rows[position]
+            current_holding = holdings[row]
             new_holding = current_holding - txn.quantity
             if new_holding < 0:
                 raise ValueError(
                     f"SELL quantity exceeds current holding!\n"
                     f"Broker: {result.broker_name}\n"
                     f"Stock: {txn.stock_code}\n"
-                    f"Current holding: {current_holding}\n"
+                    f"Current holding: {float(current_holding)}\n"
                     f"SELL quantity: {txn.quantity}\n"
-                    f"Resulting holding: {new_holding} (NEGATIVE!)\n"
+                    f"Resulting holding: {float(new_holding)} (NEGATIVE!)\n"
                     f"This is not a 'Sell Short' (quantity should be negative for shorts).\n"
                     f"Please check the transaction data or base date."
                 )
             
-            position.holding = new_holding
+            holdings[row] = new_holding
+            dirty.add(row)
             if abs(new_holding) < 1e-9:
-                result.positions.remove(position)
+                # Remove by identity: Position equality would match any equal-valued position
+                for idx, pos in enumerate(result.positions):
+                    if pos is position:
+                        del result.positions[idx]
+                        break
+                rows.discard(position)
                 logger.debug(f"  Position {txn.stock_code} fully closed")
         
         current_usd = result.cash_data.get('USD', 0) or 0
@@ -834,10 +1002,7 @@ class TradeConfirmationProcessor:
         for idx, pos in enumerate(positions):
             pos_obj = self._ensure_position_object(pos, broker_name)
             positions[idx] = pos_obj
-            pos_normalized = self.standardize_option_format(
-                self._normalize_equity_code(pos_obj.stock_code)
-            )
-            if pos_normalized == normalized_code:
+            if self._canonical(pos_obj) == normalized_code:
                 return pos_obj
 
         if target.option_format:
@@ -849,15 +1014,22 @@ class TradeConfirmationProcessor:
                     )
                     return pos
 
-        for pos in positions:
-            pos_obj = self._ensure_position_object(pos, broker_name)
-            pos_normalized = self.standardize_option_format(
-                self._normalize_equity_code(pos_obj.stock_code)
-            )
-            if pos_normalized == normalized_code:
-                return pos_obj
-
         return None
+
+    def _canonical(self, pos: Position) -> str:
+        """
+        Return the canonical code of a position, computed once and cached on it.
+
+        stock_code is never reassigned after construction, so the cached value
+        stays valid for the lifetime of the Position.
+        """
+        canon = pos.__dict__.get('_canon')
+        if canon is None:
+            canon = self.standardize_option_format(
+                self._normalize_equity_code(pos.stock_code)
+            )
+            pos.__dict__['_canon'] = canon
+        return canon
     
     @staticmethod
     def _normalize_holding(value):
@@ -882,19 +1054,13 @@ class TradeConfirmationProcessor:
         if isinstance(position, Position):
             return position
         
-        pos_obj = Position(
-            stock_code=position.get('StockCode', ''),
-            holding=self._normalize_holding(position.get('Holding', 0)),
-            broker_price=position.get('BrokerPrice'),
-            price_currency=position.get('PriceCurrency'),
-            raw_description=position.get('RawDescription'),
-            multiplier=position.get('Multiplier'),
-            broker=broker_name,
-            context=context
-        )
-        pos_obj.final_price = position.get('FinalPrice')
-        pos_obj.final_price_source = position.get('FinalPriceSource', '')
-        optimized_currency = position.get('OptimizedPriceCurrency')
+        get = position.get
+        kwargs = {arg: get(key, default) for arg, (key, default) in _POSITION_DICT_KEYS.items()}
+        kwargs['holding'] = self._normalize_holding(kwargs['holding'])
+        pos_obj = Position(broker=broker_name, context=context, **kwargs)
+        pos_obj.final_price = get('FinalPrice')
+        pos_obj.final_price_source = get('FinalPriceSource', '')
+        optimized_currency = get('OptimizedPriceCurrency')
         if optimized_currency:
             pos_obj.optimized_price_currency = optimized_currency
         return pos_obj
@@ -916,53 +1082,91 @@ class TradeConfirmationProcessor:
         """
         logger.info(f"Updating prices to {target_date}...")
         
-        # Collect all unique symbols
-        unique_symbols = {}
+        # Collect all unique symbols; positions are flattened and each one
+        # records the row of its symbol in the per-symbol price table
+        unique_symbols: Dict[str, int] = {}
+        first_positions: List[Position] = []
+        positions_flat: List[Position] = []
+        position_symbol_ids: List[int] = []
         for result in results:
-            for i, position in enumerate(result.positions):
-                pos_obj = self._ensure_position_object(position, result.broker_name)
-                result.positions[i] = pos_obj
-                stock_code = pos_obj.stock_code
-                if stock_code not in unique_symbols:
-                    unique_symbols[stock_code] = []
-                unique_symbols[stock_code].append((result, i))
+            positions = result.positions
+            for i, raw in enumerate(positions):
+                position = self._ensure_position_object(raw, result.broker_name)
+                positions[i] = position
+                symbol_id = unique_symbols.setdefault(position.stock_code, len(unique_symbols))
+                if symbol_id == len(first_positions):
+                    first_positions.append(position)
+                positions_flat.append(position)
+                position_symbol_ids.append(symbol_id)
         
         logger.info(f"Fetching prices for {len(unique_symbols)} unique symbols")
         
-        # Fetch prices for each symbol (same logic as broker_processor)
-        successful = 0
-        for symbol in unique_symbols:
-            try:
-                # Get first position to extract raw_description
-                first_result, first_idx = unique_symbols[symbol][0]
-                first_position = first_result.positions[first_idx]
-                raw_description = first_position.raw_description or ''
-                
-                # get_stock_price now returns (price, currency) tuple
-                price, api_currency = get_stock_price(symbol, target_date, None, raw_description)
-                
-                if price is not None and price > 0.0 and api_currency:
-                    # Use API-provided currency (determined by API type: US vs HK)
-                    price_currency = api_currency
-                    price_source = 'Futu'
-                    
-                    # Update all positions with this symbol
-                    for result, pos_idx in unique_symbols[symbol]:
-                        position = result.positions[pos_idx]
-                        position.final_price = price
-                        position.final_price_source = price_source
-                        position.optimized_price_currency = price_currency
-                    
-                    successful += 1
-                else:
-                    logger.warning(f"No valid price returned for {symbol}")
-                    self.price_failures.append(symbol)
-                    
-            except Exception as e:
+        # Past closes are final; prices for today (or later) may still move
+        today = datetime.now().strftime('%Y-%m-%d')
+        max_age = PRICE_CACHE_TODAY_TTL if target_date >= today else None
+        prices = {}
+        if self.price_cache is not None:
+            prices = self.price_cache.get_many(unique_symbols, target_date, max_age)
+        if prices:
+            logger.info(f"Using cached prices for {len(prices)} symbols")
+        
+        requests = []
+        for symbol, symbol_id in unique_symbols.items():
+            if symbol in prices:
+                continue
+            # Get first position to extract raw_description
+            raw_description = first_positions[symbol_id].raw_description or ''
+            requests.append((symbol, raw_description))
+        
+        new_rows = []
+        
+        fetched = asyncio.run(self._fetch_prices(requests, target_date))
+        
+        failed = set()
+        for symbol, outcome in fetched:
+            if isinstance(outcome, Exception):
                 logger.error(
-                    f"Exception while fetching price for {symbol}: {type(e).__name__}: {e}"
+                    f"Exception while fetching price for {symbol}: {type(outcome).__name__}: {outcome}"
                 )
-                self.price_failures.append(symbol)
+                failed.add(symbol)
+                continue
+            
+            price, api_currency = outcome
+            if price is not None and price > 0.0 and api_currency:
+                # Use API-provided currency (determined by API type: US vs HK)
+                prices[symbol] = (price, api_currency, 'Futu')
+                new_rows.append((symbol, price, api_currency, 'Futu'))
+            else:
+                logger.warning(f"No valid price returned for {symbol}")
+                failed.add(symbol)
+        
+        if self.price_cache is not None:
+            self.price_cache.put_many(target_date, new_rows)
+        
+        # Gather every position's price from the symbol table in one step,
+        # then write back only the positions whose symbol was priced
+        symbol_count = len(unique_symbols)
+        table_price = np.full(symbol_count, np.nan)
+        table_currency = np.empty(symbol_count, dtype=object)
+        table_source = np.empty(symbol_count, dtype=object)
+        for symbol, (price, price_currency, price_source) in prices.items():
+            symbol_id = unique_symbols[symbol]
+            table_price[symbol_id] = price
+            table_currency[symbol_id] = price_currency
+            table_source[symbol_id] = price_source
+        
+        ids = np.array(position_symbol_ids, dtype=np.intp)
+        final_prices = table_price[ids]
+        currencies = table_currency[ids]
+        sources = table_source[ids]
+        for k in np.flatnonzero(~np.isnan(final_prices)):
+            position = positions_flat[k]
+            position.final_price = float(final_prices[k])
+            position.final_price_source = sources[k]
+            position.optimized_price_currency = currencies[k]
+        successful = len(prices)
+        
+        self.price_failures.extend(s for s in unique_symbols if s in failed)
         
         logger.info(
             f"Price update complete: {successful}/{len(unique_symbols)} successful"
@@ -973,6 +1177,44 @@ class TradeConfirmationProcessor:
                 f"Failed to fetch prices for {len(self.price_failures)} symbols"
             )
     
+    @staticmethod
+    async def _fetch_prices(
+        requests: List[Tuple[str, str]],
+        target_date: str
+    ) -> List[Tuple[str, object]]:
+        """
+        Fetch prices for (symbol, raw_description) pairs concurrently.
+        
+        _get_price is blocking (Futu SDK/akshare), so each call runs in a
+        worker thread; a semaphore caps in-flight requests at
+        settings.PRICE_FETCH_WORKERS and a token bucket caps request starts at
+        settings.PRICE_FETCH_RATE per second, so Futu's quota is not exceeded.
+        Exceptions are retried with capped exponential backoff and returned in
+        place of the result after the last attempt.
+        
+        Returns:
+            List of (symbol, (price, currency) or Exception), in request order
+        """
+        semaphore = asyncio.Semaphore(settings.PRICE_FETCH_WORKERS)
+        limiter = _TokenBucket(settings.PRICE_FETCH_RATE)
+        
+        async def _bounded(symbol: str, raw_description: str):
+            async with semaphore:
+                for attempt in range(PRICE_FETCH_RETRIES + 1):
+                    await limiter.acquire()
+                    try:
+                        price_info = await asyncio.to_thread(
+                            _get_price, symbol, target_date, raw_description
+                        )
+                        return symbol, price_info
+                    except Exception as e:
+                        if attempt == PRICE_FETCH_RETRIES:
+                            return symbol, e
+                        logger.debug(f"Retrying price fetch for {symbol} after {type(e).__name__}: {e}")
+                        await asyncio.sleep(min(2 ** attempt, PRICE_FETCH_BACKOFF_MAX))
+        
+        return await asyncio.gather(*(_bounded(s, d) for s, d in requests))
+    
     def _generate_update_report(
         self,
         base_date: str,
@@ -997,14 +1239,18 @@ class TradeConfirmationProcessor:
         logger.info(f"Transactions Applied: {len(transactions)}")
         
         # Count by direction
-        buy_count = sum(1 for t in transactions if t.direction == 'BUY')
-        sell_count = sum(1 for t in transactions if t.direction == 'SELL')
+        buy_count = sell_count = 0
+        for t in transactions:
+            if t.direction == 'BUY':
+                buy_count += 1
+            elif t.direction == 'SELL':
+                sell_count += 1
         logger.info(f"  - BUY: {buy_count}")
         logger.info(f"  - SELL: {sell_count}")
         
         # Total cash and positions
         total_cash = sum(r.usd_total for r in results)
-        total_positions = len([p for r in results for p in r.positions])
+        total_positions = sum(len(r.positions) for r in results)
         logger.info(f"Updated Portfolio:")
         logger.info(f"  - Total Cash (USD): ${total_cash:,.2f}")
         logger.info(f"  - Total Positions: {total_positions}")
@@ -1026,14 +1272,13 @@ def auto_detect_latest_base_date() -> str:
         Latest date string in YYYY-MM-DD format
     """
     persistence = DataPersistence()
-    available_dates = persistence.get_available_dates()
+    latest_date = persistence.get_latest_date()
     
-    if not available_dates:
+    if not latest_date:
         raise ValueError(
             "No base portfolio found. Please run normal mode first to "
             "generate a base portfolio."
         )
     
-    latest_date = available_dates[-1]  # List is sorted
     logger.info(f"Auto-detected latest base date: {latest_date}")
     return latest_date
@@ -6,12 +6,48 @@ Provides price and multiplier data for US options using Futu API
 
 from typing import Optional, Tuple
 from loguru import logger
+import atexit
+from functools import lru_cache
 import re
+import threading
 from datetime import datetime
+from decimal import Decimal
 
 from src.config import settings
 
 
+# Pattern 1: SYMBOL [US] MM/DD/YY [C/P]STRIKE
+_US_OPTION_SLASH_PATTERN = re.compile(r'([A-Z]+)\s+(?:US\s+)?(\d{2})/(\d{2})/(\d{2})\s+([CP])(\d+\.?\d*)')
+# Pattern 2: IB format - SYMBOL DDMMMYY STRIKE C/P
+_US_OPTION_IB_PATTERN = re.compile(r'([A-Z]+)\s+(\d{2})([A-Z]{3})(\d{2})\s+(\d+\.?\d*)\s+([CP])')
+# Pattern 3: Futu format - SYMBOL YYYYMMDD PUT/CALL STRIKE
+_US_OPTION_FUTU_PATTERN = re.compile(r'([A-Z]+)\s+(\d{8})\s+(PUT|CALL)\s+(\d+\.?\d*)')
+
+# Single alternation over the three formats so a description is scanned once;
+# branch order is the match priority when several formats are present
+_US_OPTION_BRANCHES = (
+    ('slash', _US_OPTION_SLASH_PATTERN),
+    ('ib', _US_OPTION_IB_PATTERN),
+    ('futu', _US_OPTION_FUTU_PATTERN),
+)
+_US_OPTION_PATTERN = re.compile(
+    '|'.join(f'(?P<{name}>{pattern.pattern})' for name, pattern in _US_OPTION_BRANCHES)
+)
+_US_OPTION_PRIORITY = {name: rank for rank, (name, _) in enumerate(_US_OPTION_BRANCHES)}
+_US_OPTION_FIELD_COUNT = {name: pattern.groups for name, pattern in _US_OPTION_BRANCHES}
+
+_MONTH_MAP = {
+    'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04',
+    'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08',
+    'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'
+}
+
+
+def _strike_thousandths(strike: str) -> int:
+    """Strike in thousandths of a dollar, computed exactly from the matched text"""
+    return int(Decimal(strike) * 1000)
+
+
 def parse_us_option_description(description: str) -> Optional[dict]:
     """
     Parse US option description from broker statement
@@ -23,20 +59,39 @@ def parse_us_option_description(description: str) -> Optional[dict]:
         "TRON 20260116 PUT 15.0" -> underlying: TRON, expiry: 2026-01-16, strike: 15.0, type: PUT (Futu format)
     
     Returns:
-        dict with: underlying, expiry_date, strike, option_type
+        dict with: underlying, expiry_date, strike, strike_thousandths, option_type
     """
     if not description:
         return None
     
+    # Same contract often appears on many rows; parse each string once and
+    # hand out a copy so callers can't mutate the cached result
+    option_info = _parse_us_option_cached(description)
+    return dict(option_info) if option_info else None
+
+
+@lru_cache(maxsize=4096)
+def _parse_us_option_cached(description: str) -> Optional[dict]:
+    """Uncached parser behind parse_us_option_description"""
     try:
         upper_desc = description.upper()
         
-        # Try Pattern 1: SYMBOL [US] MM/DD/YY [C/P]STRIKE
-        pattern1 = r'([A-Z]+)\s+(?:US\s+)?(\d{2})/(\d{2})/(\d{2})\s+([CP])(\d+\.?\d*)'
-        match = re.search(pattern1, upper_desc)
+        match = min(
+            _US_OPTION_PATTERN.finditer(upper_desc),
+            key=lambda m: _US_OPTION_PRIORITY[m.lastgroup],
+            default=None
+        )
+        if not match:
+            return None
+        
+        # Fields of the matched format follow its branch group
+        branch = match.lastgroup
+        first_field = _US_OPTION_PATTERN.groupindex[branch]
+        fields = match.groups()[first_field:first_field + _US_OPTION_FIELD_COUNT[branch]]
         
-        if match:
-            symbol, month, day, year, opt_type, strike = match.groups()
+        if branch == 'slash':
+            # Pattern 1: SYMBOL [US] MM/DD/YY [C/P]STRIKE
+            symbol, month, day, year, opt_type, strike = fields
             
             # Convert YY to YYYY
             year_int = int(year)
@@ -49,24 +104,15 @@ def parse_us_option_description(description: str) -> Optional[dict]:
                 'underlying': f'US.{symbol}',
                 'expiry_date': expiry_date,
                 'strike': float(strike),
+                'strike_thousandths': _strike_thousandths(strike),
                 'option_type': 'CALL' if opt_type == 'C' else 'PUT'
             }
         
-        # Try Pattern 2: IB format - SYMBOL DDMMMYY STRIKE C/P
-        pattern2 = r'([A-Z]+)\s+(\d{2})([A-Z]{3})(\d{2})\s+(\d+\.?\d*)\s+([CP])'
-        match = re.search(pattern2, upper_desc)
-        
-        if match:
-            symbol, day, month_str, year, strike, opt_type = match.groups()
-            
-            # Month mapping
-            month_map = {
-                'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04',
-                'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08',
-                'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'
-            }
+        if branch == 'ib':
+            # Pattern 2: IB format - SYMBOL DDMMMYY STRIKE C/P
+            symbol, day, month_str, year, strike, opt_type = fields
             
-            month = month_map.get(month_str)
+            month = _MONTH_MAP.get(month_str)
             if not month:
                 logger.debug(f"Unknown month abbreviation: {month_str}")
                 return None
@@ -82,37 +128,157 @@ def parse_us_option_description(description: str) -> Optional[dict]:
                 'underlying': f'US.{symbol}',
                 'expiry_date': expiry_date,
                 'strike': float(strike),
+                'strike_thousandths': _strike_thousandths(strike),
                 'option_type': 'CALL' if opt_type == 'C' else 'PUT'
             }
         
-        # Try Pattern 3: Futu format - SYMBOL YYYYMMDD PUT/CALL STRIKE
-        pattern3 = r'([A-Z]+)\s+(\d{8})\s+(PUT|CALL)\s+(\d+\.?\d*)'
-        match = re.search(pattern3, upper_desc)
+        # Pattern 3: Futu format - SYMBOL YYYYMMDD PUT/CALL STRIKE
+        symbol, date_str, opt_type, strike = fields
+        
+        # Parse YYYYMMDD
+        year = int(date_str[0:4])
+        month = int(date_str[4:6])
+        day = int(date_str[6:8])
+        
+        # Format date
+        expiry_date = f"{year:04d}-{month:02d}-{day:02d}"
+        
+        return {
+            'underlying': f'US.{symbol}',
+            'expiry_date': expiry_date,
+            'strike': float(strike),
+            'strike_thousandths': _strike_thousandths(strike),
+            'option_type': opt_type
+        }
         
-        if match:
-            symbol, date_str, opt_type, strike = match.groups()
-            
-            # Parse YYYYMMDD
-            year = int(date_str[0:4])
-            month = int(date_str[4:6])
-            day = int(date_str[6:8])
-            
-            # Format date
-            expiry_date = f"{year:04d}-{month:02d}-{day:02d}"
-            
-            return {
-                'underlying': f'US.{symbol}',
-                'expiry_date': expiry_date,
-                'strike': float(strike),
-                'option_type': opt_type
-            }
-            
     except Exception as e:
         logger.debug(f"Failed to parse US option description '{description}': {e}")
     
     return None
 
 
+# One Futu quote context shared by every lookup in the process (opened lazily).
+# The lock is held for each whole request, so lookups from several threads
+# take turns and a failed context is never closed under another request.
+_quote_ctx = None
+_quote_ctx_lock = threading.Lock()
+
+
+def _get_quote_context():
+    """Return the shared Futu quote context, connecting on first use (caller holds _quote_ctx_lock)"""
+    global _quote_ctx
+    if _quote_ctx is None:
+        import futu as ft
+        _quote_ctx = ft.OpenQuoteContext(host=settings.FUTU_HOST, port=settings.FUTU_PORT)
+    return _quote_ctx
+
+
+def _discard_quote_context() -> None:
+    """Close a quote context that failed so the next lookup reconnects (caller holds _quote_ctx_lock)"""
+    global _quote_ctx
+    quote_ctx, _quote_ctx = _quote_ctx, None
+    if quote_ctx is None:
+        return
+    try:
+        quote_ctx.close()
+    except Exception as e:
+        logger.debug(f"Error closing Futu quote context: {e}")
+
+
+def close_quote_context() -> None:
+    """Close the shared Futu quote context (also runs at interpreter exit)"""
+    with _quote_ctx_lock:
+        _discard_quote_context()
+
+
+atexit.register(close_quote_context)
+
+
+def _build_futu_option_code(option_info: dict) -> str:
+    """
+    Construct Futu US option code
+    
+    Format: US.{SYMBOL}{YYMMDD}{C/P}{STRIKE*1000}
+    """
+    symbol = option_info['underlying'].replace('US.', '')
+    expiry_str = option_info['expiry_date'].replace('-', '')[2:]  # YYMMDD
+    opt_letter = 'C' if option_info['option_type'] == 'CALL' else 'P'
+    strike_code = f"{option_info['strike_thousandths']:05d}"
+    return f"US.{symbol}{expiry_str}{opt_letter}{strike_code}"
+
+
+def _request_us_option_close(quote_ctx, ft, futu_code: str, date: str) -> Tuple[Optional[float], Optional[int]]:
+    """
+    Query the historical daily close for one Futu option code on an open quote context
+    
+    Returns:
+        Tuple of (price, multiplier) or (None, None) if no valid close exists
+    """
+    result = quote_ctx.request_history_kline(
+        code=futu_code,
+        start=date,
+        end=date,
+        ktype=ft.KLType.K_DAY,
+        autype=ft.AuType.QFQ
+    )
+    
+    # Handle 3-element tuple return (ret, data, page_req_key)
+    if not isinstance(result, tuple) or len(result) < 2:
+        logger.debug(f"Unexpected return format from request_history_kline")
+        return None, None
+    
+    ret = result[0]
+    kline_data = result[1]
+    
+    if ret != ft.RET_OK or kline_data.empty:
+        logger.debug(f"No historical K-line data for {futu_code} on {date}")
+        return None, None
+    
+    # Extract close price
+    price = kline_data.iloc[0]['close']
+    if price is None or price <= 0:
+        logger.debug(f"Invalid price for {futu_code}: {price}")
+        return None, None
+    
+    # US options standard multiplier is 100
+    multiplier = 100
+    
+    logger.success(f"Got US option historical price: {futu_code} @ {date} -> ${price}, multiplier: {multiplier}")
+    return float(price), multiplier
+
+
+def fetch_us_option_close(raw_description: str, date: str) -> Tuple[Optional[float], Optional[int]]:
+    """
+    Look up one US option close on the shared Futu quote context
+    
+    Unlike get_us_option_price_from_futu, Futu errors are raised (after
+    dropping the quote context) so callers can retry them.
+    
+    Returns:
+        Tuple of (price, multiplier) or (None, None) if the description
+        cannot be parsed or no valid close exists
+    """
+    import futu as ft
+    
+    # Parse option details
+    option_info = parse_us_option_description(raw_description)
+    if not option_info:
+        logger.debug(f"Cannot parse US option: {raw_description}")
+        return None, None
+    
+    logger.debug(f"Parsed US option: {option_info}")
+    
+    futu_code = _build_futu_option_code(option_info)
+    logger.debug(f"Constructed Futu option code: {futu_code}")
+    
+    with _quote_ctx_lock:
+        try:
+            return _request_us_option_close(_get_quote_context(), ft, futu_code, date)
+        except Exception:
+            _discard_quote_context()
+            raise
+
+
 def get_us_option_price_from_futu(stock_code: str, raw_description: str, date: str) -> Tuple[Optional[float], Optional[int]]:
     """
     Get US option price and multiplier from Futu API
@@ -132,67 +298,7 @@ def get_us_option_price_from_futu(stock_code: str, raw_description: str, date: s
         Tuple of (price, multiplier) or (None, None) if failed
     """
     try:
-        import futu as ft
-        
-        # Parse option details
-        option_info = parse_us_option_description(raw_description)
-        if not option_info:
-            logger.debug(f"Cannot parse US option: {raw_description}")
-            return None, None
-        
-        logger.debug(f"Parsed US option: {option_info}")
-        
-        quote_ctx = None
-        try:
-            quote_ctx = ft.OpenQuoteContext(host=settings.FUTU_HOST, port=settings.FUTU_PORT)
-            
-            # Step 1: Construct Futu option code
-            # Format: US.{SYMBOL}{YYMMDD}{C/P}{STRIKE*1000}
-            symbol = option_info['underlying'].replace('US.', '')
-            expiry_str = option_info['expiry_date'].replace('-', '')[2:]  # YYMMDD
-            opt_letter = 'C' if option_info['option_type'] == 'CALL' else 'P'
-            strike_code = f"{int(option_info['strike'] * 1000):05d}"
-            
-            futu_code = f"US.{symbol}{expiry_str}{opt_letter}{strike_code}"
-            logger.debug(f"Constructed Futu option code: {futu_code}")
-            
-            # Step 2: Get historical K-line for specified date
-            result = quote_ctx.request_history_kline(
-                code=futu_code,
-                start=date,
-                end=date,
-                ktype=ft.KLType.K_DAY,
-                autype=ft.AuType.QFQ
-            )
-            
-            # Handle 3-element tuple return (ret, data, page_req_key)
-            if not isinstance(result, tuple) or len(result) < 2:
-                logger.debug(f"Unexpected return format from request_history_kline")
-                return None, None
-            
-            ret = result[0]
-            kline_data = result[1]
-            
-            if ret != ft.RET_OK or kline_data.empty:
-                logger.debug(f"No historical K-line data for {futu_code} on {date}")
-                return None, None
-            
-            # Step 3: Extract close price
-            price = kline_data.iloc[0]['close']
-            if price is None or price <= 0:
-                logger.debug(f"Invalid price for {futu_code}: {price}")
-                return None, None
-            
-            # US options standard multiplier is 100
-            multiplier = 100
-            
-            logger.success(f"Got US option historical price: {futu_code} @ {date} -> ${price}, multiplier: {multiplier}")
-            return float(price), multiplier
-            
-        finally:
-            if quote_ctx:
-                quote_ctx.close()
-                
+        return fetch_us_option_close(raw_description, date)
     except Exception as e:
         logger.debug(f"Error getting US option price for {raw_description}: {e}")
         return None, None
@@ -3,12 +3,16 @@ Utility functions for FundMate broker statement processor.
 Contains helper functions for validation, logging, and display formatting.
 """
 
+import io
 import os
 import re
+import threading
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any, Union, TYPE_CHECKING
 from loguru import logger
+import numpy as np
 import sys
 
 if __package__ is None or __package__ == "":
@@ -22,7 +26,14 @@ from src.config import settings
 if TYPE_CHECKING:
     from src.broker_processor import ProcessedResult
 
+# Option keywords, matched in one scan of the uppercased code/description
+_OPTION_KW_RE = re.compile(r'OPTION|CALL|PUT', re.ASCII)
+# HKATS option code: 3 letters + 6 or 8 digit date
+# (product codes are plain ASCII, so skip Unicode class lookups)
+_HKATS_RE = re.compile(r'[A-Z]{3}[\s.]+(?:HK\s+)?\d{6,8}', re.ASCII)
 
+
+@lru_cache(maxsize=4096)
 def _identify_hk_option(stock_code: str, raw_description: str = None) -> bool:
     """
     Identify if this is a Hong Kong option based on code pattern.
@@ -39,9 +50,10 @@ def _identify_hk_option(stock_code: str, raw_description: str = None) -> bool:
     
     # Check for HKATS code pattern: 3 letters + 6 or 8 digits
     # Examples: "CLI 250929 19.00 CALL" or "(CLI.HK 20250929 CALL 19.0)"
-    import re
     description = raw_description or stock_code or ""
-    if re.search(r'[A-Z]{3}[\s.]+(?:HK\s+)?\d{6,8}', description):
+    # A match needs a separator after the 3 letters, so plain codes like
+    # "00700" or "AAPL" can skip the regex entirely
+    if not description.isalnum() and _HKATS_RE.search(description):
         return True
     
     # Legacy pattern: "XXXX OPTION" (no longer used but kept for compatibility)
@@ -51,44 +63,70 @@ def _identify_hk_option(stock_code: str, raw_description: str = None) -> bool:
             # HK stock codes: 4 digits, start with 0-3, 9
             if (len(underlying_code) == 4 and 
                 underlying_code.isdigit() and
-                underlying_code.startswith(('0', '1', '2', '3', '9'))):
+                underlying_code[0] in '01239'):
                 return True
     
     return False
 
 
-def is_option_contract(stock_code: str, raw_description: str = None) -> bool:
+def _is_occ_format(code: str) -> bool:
     """
-    Simple option detection - options have obvious names like "CALL", "PUT", "OPTION"
-    Also detects OCC format: SYMBOL YYMMDD C/P PRICE (e.g., SBET260116P25000)
+    Check for OCC option symbol: SYMBOL(1-4 letters) YYMMDD(6 digits) C/P(1 letter) PRICE(digits)
+    
+    Fixed-shape check done with slices instead of a regex, e.g. SBET260116P25000.
     """
-    import re
+    n = len(code)
+    if n < 9 or not code.isascii():
+        return False
+    
+    i = 0
+    while i < 4 and 'A' <= code[i] <= 'Z':
+        i += 1
+    if i == 0 or n < i + 8:
+        return False
     
+    return code[i:i + 6].isdigit() and code[i + 6] in 'CP' and code[i + 7:].isdigit()
+
+
+def _upper_text(text) -> str:
+    """Uppercase a code/description once for all option checks ('' if not a string)"""
+    return text.upper() if text and isinstance(text, str) else ''
+
+
+def _is_option_upper(upper_code: str, upper_desc: str) -> bool:
+    """is_option_contract on already-uppercased code and description"""
     # Check stock code for option keywords
-    if stock_code and isinstance(stock_code, str):
-        upper_code = stock_code.upper()
-        if any(keyword in upper_code for keyword in ['OPTION', 'CALL', 'PUT']):
+    if upper_code:
+        if _OPTION_KW_RE.search(upper_code):
             return True
         # Also check for single-letter C/P at the end (common in option symbols)
         if upper_code.endswith(' C') or upper_code.endswith(' P'):
             return True
-        # Check for OCC format: SYMBOL(1-4 letters) YYMMDD(6 digits) C/P(1 letter) PRICE(digits)
-        # Example: SBET260116P25000
-        if re.match(r'^[A-Z]{1,4}\d{6}[CP]\d+$', upper_code):
+        # Check for OCC format, e.g. SBET260116P25000
+        if _is_occ_format(upper_code):
             return True
     
     # Check raw description for option keywords  
-    if raw_description and isinstance(raw_description, str):
-        upper_desc = raw_description.upper()
-        if any(keyword in upper_desc for keyword in ['OPTION', 'CALL', 'PUT']):
+    if upper_desc:
+        if _OPTION_KW_RE.search(upper_desc):
             return True
         # Check for OCC format in description
-        if re.match(r'^[A-Z]{1,4}\d{6}[CP]\d+$', upper_desc):
+        if _is_occ_format(upper_desc):
             return True
     
     return False
 
 
+@lru_cache(maxsize=4096)
+def is_option_contract(stock_code: str, raw_description: str = None) -> bool:
+    """
+    Simple option detection - options have obvious names like "CALL", "PUT", "OPTION"
+    Also detects OCC format: SYMBOL YYMMDD C/P PRICE (e.g., SBET260116P25000)
+    """
+    return _is_option_upper(_upper_text(stock_code), _upper_text(raw_description))
+
+
+@lru_cache(maxsize=4096)
 def get_option_multiplier(stock_code: str, raw_description: str = None, broker_multiplier: int = None) -> int:
     """
     Get the correct multiplier for position value calculation
@@ -107,20 +145,17 @@ def get_option_multiplier(stock_code: str, raw_description: str = None, broker_m
         logger.debug(f"Using broker-provided multiplier: {broker_multiplier}")
         return int(broker_multiplier)
     
+    # Uppercase once for the option and OTC checks below
+    upper_code = _upper_text(stock_code)
+    upper_desc = _upper_text(raw_description)
+    
     # Check if it's an option first
-    if not is_option_contract(stock_code, raw_description):
+    if not _is_option_upper(upper_code, upper_desc):
         return 1  # Regular stock
     
     # Check for OTC options FIRST - multiplier is always 1
-    if stock_code and isinstance(stock_code, str):
-        upper_code = stock_code.upper()
-        if 'OTC' in upper_code:
-            return 1  # OTC option
-    
-    if raw_description and isinstance(raw_description, str):
-        upper_desc = raw_description.upper()
-        if 'OTC' in upper_desc:
-            return 1  # OTC option
+    if 'OTC' in upper_code or 'OTC' in upper_desc:
+        return 1  # OTC option
     
     # Check for HK options (non-OTC)
     if _identify_hk_option(stock_code, raw_description):
@@ -140,6 +175,29 @@ def get_option_multiplier(stock_code: str, raw_description: str = None, broker_m
     return 100
 
 
+def resolve_position_multiplier(stock_code: str, raw_description: str = None,
+                                broker_multiplier: int = None) -> int:
+    """
+    Multiplier used to value a position
+    
+    Args:
+        stock_code: Stock code/symbol
+        raw_description: Optional raw description from broker
+        broker_multiplier: Optional multiplier from broker statement
+    
+    Returns:
+        Broker-provided multiplier when positive, 1 for money market funds,
+        otherwise the detected option multiplier
+    """
+    # Broker-provided multiplier wins outright, no need for option detection
+    if broker_multiplier is not None and broker_multiplier > 0:
+        return int(broker_multiplier)
+    # MMF units, never an option
+    if is_money_market_fund(raw_description):
+        return 1
+    return get_option_multiplier(stock_code, raw_description, broker_multiplier)
+
+
 def calculate_position_value(price: float, holding: int, stock_code: str, 
                             raw_description: str = None, broker_multiplier: int = None) -> tuple:
     """
@@ -158,7 +216,7 @@ def calculate_position_value(price: float, holding: int, stock_code: str,
     if price is None or price <= 0:
         return (0.0, 1)
     
-    multiplier = get_option_multiplier(stock_code, raw_description, broker_multiplier)
+    multiplier = resolve_position_multiplier(stock_code, raw_description, broker_multiplier)
     position_value = price * holding * multiplier
     
     if multiplier > 1:
@@ -171,6 +229,28 @@ def calculate_position_value(price: float, holding: int, stock_code: str,
     return (position_value, multiplier)
 
 
+def calculate_position_value_batch(prices, holdings, multipliers) -> np.ndarray:
+    """
+    Vectorized calculate_position_value for many positions at once
+    
+    Args:
+        prices: Price per share/contract for each position
+        holdings: Number of shares/contracts for each position
+        multipliers: Multiplier for each position (see resolve_position_multiplier)
+    
+    Returns:
+        Array of position values; non-positive prices are valued at 0.0
+    """
+    prices = np.asarray(prices, dtype=float)
+    values = prices * np.asarray(holdings, dtype=float) * np.asarray(multipliers, dtype=float)
+    return np.where(prices <= 0, 0.0, values)
+
+
+# (log_dir, date) the handlers were last set up for, to ignore repeated setup calls
+_logging_initialized_for = None
+_logging_lock = threading.Lock()
+
+
 def setup_logging(log_dir: str, date: str) -> None:
     """
     Setup logging configuration with timestamped log files.
@@ -179,37 +259,47 @@ def setup_logging(log_dir: str, date: str) -> None:
         log_dir: Directory for log files
         date: Date string for log organization
     """
-    from datetime import datetime
-    
-    log_path = Path(log_dir) / date
-    log_path.mkdir(parents=True, exist_ok=True)
-    
-    # Create timestamped log file name
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = log_path / f"fundmate_{timestamp}.log"
-    
-    # Remove default handler and add both console and file handlers
-    logger.remove()
+    global _logging_initialized_for
+    
+    # Broker runs on several threads may call this at once
+    with _logging_lock:
+        # Already logging to this directory/date: keep the current handlers and log file
+        if _logging_initialized_for == (str(log_dir), date):
+            return
+    
+        log_path = Path(log_dir) / date
+        log_path.mkdir(parents=True, exist_ok=True)
+    
+        # Create timestamped log file name
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_file = log_path / f"fundmate_{timestamp}.log"
+    
+        # Remove default handler and add both console and file handlers
+        logger.remove()
+    
+        # Add console handler
+        logger.add(
+            sys.stdout,
+            level="INFO",
+            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+            colorize=False
+        )
     
-    # Add console handler
-    logger.add(
-        lambda msg: print(msg, end=""),
-        level="INFO",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}\n",
-        colorize=False
-    )
+        # Add file handler with timestamped name (no rotation needed);
+        # DEBUG volume is high, so writes go through loguru's background queue
+        logger.add(
+            str(log_file),
+            level="DEBUG",
+            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+            backtrace=True,
+            diagnose=True,
+            enqueue=True
+        )
     
-    # Add file handler with timestamped name (no rotation needed)
-    logger.add(
-        str(log_file),
-        level="DEBUG",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-        backtrace=True,
-        diagnose=True
-    )
+        _logging_initialized_for = (str(log_dir), date)
     
-    logger.info(f"Logging initialized for date: {date}")
-    logger.info(f"Log file: {log_file}")
+        logger.info(f"Logging initialized for date: {date}")
+        logger.info(f"Log file: {log_file}")
 
 
 def validate_date_format(date_str: str) -> bool:
@@ -222,7 +312,10 @@ def validate_date_format(date_str: str) -> bool:
     Returns:
         bool: True if valid format, False otherwise
     """
-    if not date_str:
+    # Cheap YYYY-MM-DD shape check before the slower strptime call
+    if not (date_str and len(date_str) == 10 and date_str.isascii()
+            and date_str[4] == '-' and date_str[7] == '-'
+            and date_str[:4].isdigit() and date_str[5:7].isdigit() and date_str[8:].isdigit()):
         return False
     
     try:
@@ -242,7 +335,8 @@ def validate_broker_folder(folder_path: str) -> bool:
     Returns:
         bool: True if folder exists, False otherwise
     """
-    return os.path.exists(folder_path) and os.path.isdir(folder_path)
+    # isdir() is False for missing paths too, so one stat covers both checks
+    return os.path.isdir(folder_path)
 
 
 def print_processing_info(broker_folder: str, date: str, broker: str = None, 
@@ -257,16 +351,18 @@ def print_processing_info(broker_folder: str, date: str, broker: str = None,
         output: Output directory
         force: Force re-conversion flag
     """
-    print("=" * 60)
-    print("FundMate - Broker Statement Processor")
-    print("=" * 60)
-    print(f"PDF Folder: {broker_folder}")
-    print(f"Date: {date}")
-    print(f"Broker: {broker if broker else 'All brokers'}")
-    print(f"Output: {output}")
-    print(f"Force Re-conversion: {'Yes' if force else 'No'}")
-    print("=" * 60)
-    print()
+    separator = "=" * 60
+    print(
+        f"{separator}\n"
+        f"FundMate - Broker Statement Processor\n"
+        f"{separator}\n"
+        f"PDF Folder: {broker_folder}\n"
+        f"Date: {date}\n"
+        f"Broker: {broker if broker else 'All brokers'}\n"
+        f"Output: {output}\n"
+        f"Force Re-conversion: {'Yes' if force else 'No'}\n"
+        f"{separator}\n"
+    )
 
 
 def check_images_exist(output_folder: str, broker_filter: str = None) -> Dict[str, bool]:
@@ -314,6 +410,19 @@ def ensure_output_directories() -> None:
     settings.ensure_directories()
 
 
+def _to_int_holding(holding) -> int:
+    """Convert a holding (number or text like "1,000") to int, 0 if it can't be parsed"""
+    try:
+        if isinstance(holding, (int, float)):
+            return int(holding)
+        text = str(holding)
+        if ',' in text:
+            text = text.replace(',', '')
+        return int(float(text))
+    except (ValueError, TypeError, OverflowError):
+        return 0
+
+
 def print_asset_summary(results: List["ProcessedResult"], date: str = None) -> None:
     """
     Print complete asset summary (cash + positions) for all processed brokers.
@@ -321,28 +430,22 @@ def print_asset_summary(results: List["ProcessedResult"], date: str = None) -> N
     Args:
         results: List of ProcessedResult objects from broker processing
     """
-    summary_lines = []
-    summary_lines.append("=" * 80)
-    summary_lines.append("Complete Asset Summary (USD)")
-    summary_lines.append("=" * 80)
-    
-    # First, show list of all brokers for easy reference
-    summary_lines.append("\n📊 BROKERS PROCESSED:")
-    broker_list = []
-    for result in results:
-        display_name = f"{result.broker_name}/{result.account_id}" if result.account_id != 'DEFAULT' else result.broker_name
-        source_type = "📊 Excel" if result.account_id == 'EXCEL' else "📄 PDF"
-        broker_list.append(f"   {source_type} {display_name}")
-    
-    summary_lines.extend(broker_list)
-    summary_lines.append(f"   Total: {len(results)} accounts")
-    summary_lines.append("\n" + "-" * 80)
+    buf = io.StringIO()
+    w = buf.write
+    w("=" * 80 + "\n")
+    w("Complete Asset Summary (USD)\n")
+    w("=" * 80 + "\n")
+    
+    # Broker list and per-broker details are built in one pass over results,
+    # the list is shown first for easy reference
+    broker_list = io.StringIO()
+    details = io.StringIO()
+    d = details.write
     
     total_cash_usd = 0.0
     total_positions_usd = 0.0
     
     for result in results:
-        broker_name = result.broker_name
         account_id = result.account_id
         cash_usd = result.usd_total
         position_usd = result.total_position_value_usd
@@ -352,50 +455,73 @@ def print_asset_summary(results: List["ProcessedResult"], date: str = None) -> N
         total_positions_usd += position_usd
         
         # Create display name
-        display_name = f"{broker_name}/{account_id}" if account_id != 'DEFAULT' else broker_name
+        display_name = f"{result.broker_name}/{account_id}" if account_id != 'DEFAULT' else result.broker_name
+        source_type = "📊 Excel" if account_id == 'EXCEL' else "📄 PDF"
+        broker_list.write(f"   {source_type} {display_name}\n")
         
-        summary_lines.append(f"\n[BROKER] {display_name}:")
-        summary_lines.append(f"   💰 Cash Total: ${cash_usd:,.2f}")
-        summary_lines.append(f"   📈 Position Total: ${position_usd:,.2f}")
-        summary_lines.append(f"   🏦 Account Total: ${cash_usd + position_usd:,.2f}")
+        d(
+            f"\n[BROKER] {display_name}:\n"
+            f"   💰 Cash Total: ${cash_usd:,.2f}\n"
+            f"   📈 Position Total: ${position_usd:,.2f}\n"
+            f"   🏦 Account Total: ${cash_usd + position_usd:,.2f}\n"
+        )
         
         # Display original currency information
-        if cash_data.get('Total') is not None:
+        cash_total = cash_data.get('Total')
+        if cash_total is not None:
             total_type = cash_data.get('Total_type', 'USD')
-            summary_lines.append(f"      Original Cash: {cash_data['Total']:,} {total_type}")
+            d(f"      Original Cash: {cash_total:,} {total_type}\n")
         else:
             # Show individual currency details
             cash_details = []
-            if cash_data.get('CNY') is not None:
-                cash_details.append(f"CNY: {cash_data['CNY']:,.2f}")
-            if cash_data.get('HKD') is not None:
-                cash_details.append(f"HKD: {cash_data['HKD']:,.2f}")
-            if cash_data.get('USD') is not None:
-                cash_details.append(f"USD: {cash_data['USD']:,.2f}")
+            for currency in ('CNY', 'HKD', 'USD'):
+                amount = cash_data.get(currency)
+                if amount is not None:
+                    cash_details.append(f"{currency}: {amount:,.2f}")
             if cash_details:
-                summary_lines.append(f"      Cash Details: {', '.join(cash_details)}")
+                d(f"      Cash Details: {', '.join(cash_details)}\n")
         
         # Display position information
-        if result.position_values:
-            pv = result.position_values
+        pv = result.position_values
+        if pv:
             successful = pv.get('successful_prices', 0)
             failed = pv.get('failed_prices', 0)
             total_stocks = successful + failed
-            summary_lines.append(f"      Position Details: {successful}/{total_stocks} stocks priced")
+            d(f"      Position Details: {successful}/{total_stocks} stocks priced\n")
             
             if failed > 0:
-                summary_lines.append(f"      ⚠️  {failed} stocks failed to get price")
+                d(f"      ⚠️  {failed} stocks failed to get price\n")
+    
+    w("\n📊 BROKERS PROCESSED:\n")
+    w(broker_list.getvalue())
+    w(f"   Total: {len(results)} accounts\n")
+    w("\n" + "-" * 80 + "\n")
+    w(details.getvalue())
     
     # Cross-broker position aggregation (optimized with pre-calculated prices)
-    summary_lines.append("\n" + "-" * 80)
-    summary_lines.append("📊 CROSS-BROKER POSITION SUMMARY:")
+    w("\n" + "-" * 80 + "\n")
+    w("📊 CROSS-BROKER POSITION SUMMARY:\n")
     
     # Aggregate positions by stock code - simplified since prices are pre-calculated
+    # USD rate per currency, looked up once and shared by valuation and the
+    # display price (None when the conversion failed)
+    usd_rates = {'USD': 1.0}
+    
+    def usd_rate(currency: str):
+        if currency not in usd_rates:
+            try:
+                usd_rates[currency] = exchange_handler.get_rate_lazy(currency, 'USD', date)
+            except Exception as e:
+                logger.warning(f"Currency conversion failed for {currency}→USD: {e}")
+                usd_rates[currency] = None
+        return usd_rates[currency]
+    
     position_aggregation = {}
+    key_ids = {}
+    priced_keys, priced_prices, priced_holdings, priced_multipliers, priced_currencies = [], [], [], [], []
     for result in results:
-        broker_display = f"{result.broker_name}/{result.account_id}" if result.account_id != 'DEFAULT' else result.broker_name
-        if result.account_id == 'EXCEL':
-            broker_display = result.broker_name
+        # Depends only on the broker, so built once per result rather than per position
+        broker_display = result.broker_name if result.account_id in ('DEFAULT', 'EXCEL') else f"{result.broker_name}/{result.account_id}"
             
         for position in result.positions:
             # Support both Position objects and dicts
@@ -416,6 +542,9 @@ def print_asset_summary(results: List["ProcessedResult"], date: str = None) -> N
                 final_price_source = position.get('FinalPriceSource', 'N/A')
                 price_currency = position.get('OptimizedPriceCurrency') or position.get('PriceCurrency', 'USD')
             
+            # Legacy rows may carry None/NaN; valuation and display share this string key
+            price_currency = str(price_currency)
+            
             # For options, use RawDescription for unique identification
             # Otherwise different option contracts with same underlying get merged
             if 'OPTION' in stock_code.upper() and raw_desc:
@@ -426,56 +555,68 @@ def print_asset_summary(results: List["ProcessedResult"], date: str = None) -> N
                 unique_key = stock_code
             
             # Ensure holding is numeric
-            try:
-                holding_num = int(holding) if isinstance(holding, (int, float)) else int(float(str(holding).replace(',', '')))
-            except (ValueError, TypeError):
-                holding_num = 0
+            holding_num = _to_int_holding(holding)
             
-            if unique_key not in position_aggregation:
-                position_aggregation[unique_key] = {
+            agg = position_aggregation.get(unique_key)
+            if agg is None:
+                key_ids[unique_key] = len(key_ids)
+                agg = position_aggregation[unique_key] = {
                     'total_holding': 0,
                     'brokers': [],
                     'final_price': final_price,
                     'price_source': final_price_source,
                     'price_currency': price_currency,
+                    'usd_price': None,
                     'total_value_usd': 0.0
                 }
             
             # Add holding and broker info
-            position_aggregation[unique_key]['total_holding'] += holding_num
-            position_aggregation[unique_key]['brokers'].append(f"{broker_display}: {holding_num:,}")
+            agg['total_holding'] += holding_num
+            agg['brokers'].append(f"{broker_display}: {holding_num:,}")
             
-            # Add position value with currency conversion (preserve original separate calculation logic)
+            # Collect priced rows column-wise; values are computed in one vectorized step below
             if final_price is not None:
                 # Calculate individual position value with correct multiplier
                 broker_multiplier = position.multiplier if hasattr(position, 'multiplier') else position.get('Multiplier')
-                multiplier = get_option_multiplier(stock_code, raw_desc, broker_multiplier)
-                position_value_original = final_price * holding_num * multiplier
-                
-                if multiplier > 1:
-                    logger.debug(f"Applied {multiplier}x option multiplier for {stock_code}: {holding_num} × {final_price} × {multiplier} = {position_value_original}")
-                else:
-                    logger.debug(f"Stock/OTC calculation for {stock_code}: {holding_num} × {final_price} = {position_value_original}")
-                
-                # Convert to USD if needed
-                if price_currency != 'USD':
-                    try:
-                        usd_rate = exchange_handler.get_rate_lazy(price_currency, 'USD', date)
-                        position_value_usd = position_value_original * usd_rate
-                    except Exception as e:
-                        logger.warning(f"Currency conversion failed for {price_currency}→USD: {e}")
-                        logger.warning(f"Using original {price_currency} value without conversion")
-                        position_value_usd = position_value_original  # Keep original value, mark as unconverted
-                        price_currency = f"{price_currency}_UNCONVERTED"  # Mark for display
-                else:
-                    position_value_usd = position_value_original
+                multiplier = resolve_position_multiplier(stock_code, raw_desc, broker_multiplier)
                 
-                # Accumulate individual position values (this preserves the separate calculation logic)
-                position_aggregation[unique_key]['total_value_usd'] += position_value_usd
+                priced_keys.append(key_ids[unique_key])
+                priced_prices.append(final_price)
+                priced_holdings.append(holding_num)
+                priced_multipliers.append(multiplier)
+                priced_currencies.append(price_currency)
+    
+    # Value every priced row at once: price × holding × multiplier × USD rate,
+    # with one FX lookup per distinct currency, then sum per aggregation key
+    if priced_keys:
+        currency_codes, currency_ids = np.unique(np.array(priced_currencies, dtype=str), return_inverse=True)
+        currency_rates = np.ones(len(currency_codes))
+        for i, currency in enumerate(currency_codes):
+            rate = usd_rate(currency)
+            if rate is None:
+                logger.warning(f"Using original {currency} value without conversion")
+            else:
+                currency_rates[i] = rate
+        
+        values_usd = (
+            calculate_position_value_batch(priced_prices, priced_holdings, priced_multipliers)
+            * currency_rates[currency_ids]
+        )
+        totals_usd = np.bincount(priced_keys, weights=values_usd, minlength=len(position_aggregation))
+        for agg, total_usd in zip(position_aggregation.values(), totals_usd):
+            agg['total_value_usd'] = float(total_usd)
+            if agg['final_price'] is None:
+                continue
+            # Display price in USD, from the rate already used for valuation
+            rate = usd_rates[agg['price_currency']]
+            if rate is None:
+                agg['price_currency'] = f"{agg['price_currency']}_UNCONVERTED"  # Mark for display
+            else:
+                agg['usd_price'] = agg['final_price'] * rate
     
     # Display aggregated positions - much simpler now
     if position_aggregation:
-        summary_lines.append("")
+        w("\n")
         total_portfolio_value = 0.0
         for unique_key in sorted(position_aggregation.keys()):
             agg = position_aggregation[unique_key]
@@ -484,17 +625,11 @@ def print_asset_summary(results: List["ProcessedResult"], date: str = None) -> N
             
             # Display price and value (using accumulated individual calculations)
             if agg['final_price'] is not None:
-                if agg['price_currency'] != 'USD' and not agg['price_currency'].endswith('_UNCONVERTED'):
-                    try:
-                        usd_rate = exchange_handler.get_rate_lazy(agg['price_currency'], 'USD', date)
-                        usd_price = agg['final_price'] * usd_rate
-                        price_display = f"{agg['final_price']:.2f} {agg['price_currency']} (${usd_price:.2f} USD, {agg['price_source']})"
-                    except Exception as e:
-                        logger.warning(f"Display conversion failed for {agg['price_currency']}: {e}")
-                        price_display = f"{agg['final_price']:.2f} {agg['price_currency']} (Conversion Failed, {agg['price_source']})"
-                elif agg['price_currency'].endswith('_UNCONVERTED'):
+                if agg['price_currency'].endswith('_UNCONVERTED'):
                     original_currency = agg['price_currency'].replace('_UNCONVERTED', '')
                     price_display = f"{agg['final_price']:.2f} {original_currency} (No USD Conversion, {agg['price_source']})"
+                elif agg['price_currency'] != 'USD':
+                    price_display = f"{agg['final_price']:.2f} {agg['price_currency']} (${agg['usd_price']:.2f} USD, {agg['price_source']})"
                 else:
                     price_display = f"{agg['final_price']:.2f} {agg['price_currency']} ({agg['price_source']})"
                 
@@ -506,23 +641,23 @@ def print_asset_summary(results: List["ProcessedResult"], date: str = None) -> N
                 value_display = "[$0.00]"
             
             # Clean display format
-            summary_lines.append(f"   {unique_key}: {total_holding:,} shares (from: {brokers_str})")
-            summary_lines.append(f"     → Price: {price_display} {value_display}")
+            w(f"   {unique_key}: {total_holding:,} shares (from: {brokers_str})\n")
+            w(f"     → Price: {price_display} {value_display}\n")
         
         # Add portfolio total
-        summary_lines.append(f"\n   📊 Cross-Broker Portfolio Value: ${total_portfolio_value:,.2f} USD")
+        w(f"\n   📊 Cross-Broker Portfolio Value: ${total_portfolio_value:,.2f} USD\n")
     else:
-        summary_lines.append("   No positions found across all brokers")
+        w("   No positions found across all brokers\n")
     
     # Add totals
-    summary_lines.append("\n" + "-" * 80)
-    summary_lines.append(f"[TOTAL] Total Cash: ${total_cash_usd:,.2f} USD")
-    summary_lines.append(f"[TOTAL] Total Positions: ${total_portfolio_value:,.2f} USD")
-    summary_lines.append(f"[TOTAL] Grand Total: ${total_cash_usd + total_portfolio_value:,.2f} USD")
-    summary_lines.append("=" * 80)
+    w("\n" + "-" * 80 + "\n")
+    w(f"[TOTAL] Total Cash: ${total_cash_usd:,.2f} USD\n")
+    w(f"[TOTAL] Total Positions: ${total_portfolio_value:,.2f} USD\n")
+    w(f"[TOTAL] Grand Total: ${total_cash_usd + total_portfolio_value:,.2f} USD\n")
+    w("=" * 80)
     
     # Print and log the summary
-    summary_text = "\n".join(summary_lines)
+    summary_text = buf.getvalue()
     logger.info(f"Asset Summary Report:\n{summary_text}")
     print(summary_text)
 
@@ -531,6 +666,11 @@ def print_asset_summary(results: List["ProcessedResult"], date: str = None) -> N
 # Money Market Fund Detection
 # ============================================================================
 
+# Case-insensitive match without building a lowercased copy of the description
+_MMF_RE = re.compile(r'money market fund', re.IGNORECASE | re.ASCII)
+
+
+@lru_cache(maxsize=4096)
 def is_money_market_fund(description: str = None) -> bool:
     """
     Detect if a security is a Money Market Fund
@@ -554,4 +694,4 @@ def is_money_market_fund(description: str = None) -> bool:
     if not description:
         return False
     
-    return 'money market fund' in description.lower()
+    return _MMF_RE.search(description) is not None
@@ -4,20 +4,35 @@ A Flask-based web interface for viewing and analyzing financial portfolio data
 """
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file
-import pandas as pd
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 import json
 import threading
 import uuid
 from werkzeug.utils import secure_filename
 import zipfile
 import re
+import shutil
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+from flask.json.provider import DefaultJSONProvider
+from jinja2 import FileSystemBytecodeCache
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is used otherwise
+    orjson = None
 
 from src.config import settings
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 PACKAGE_ROOT = Path(__file__).resolve().parent
 TEMPLATE_DIR = PACKAGE_ROOT / 'templates'
 STATIC_DIR = PACKAGE_ROOT / 'static'
@@ -28,6 +43,39 @@ app = Flask(
     static_folder=str(STATIC_DIR),
 )
 
+
+
+def _json_loads(raw: bytes):
+    """Parse JSON bytes, using orjson when available"""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize an object to JSON bytes, using orjson when available"""
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj).encode('utf-8')
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (datetimes keep Flask's HTTP-date format)"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+
+# Persist compiled templates on disk so recycled gunicorn workers (max_requests)
+# load bytecode instead of recompiling; entries are keyed by template source checksum.
+# Template auto-reload already follows debug mode, so production does not re-stat templates.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
 # Configuration
 app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['MAX_CONTENT_LENGTH'] = 200 * 1024 * 1024  # 200MB max file size for ZIP files
@@ -37,9 +85,39 @@ app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'xlsx', 'xls', 'zip'}
 # Create upload directory
 app.config['UPLOAD_FOLDER'].mkdir(parents=True, exist_ok=True)
 
+# Brokers processed concurrently within one upload job
+MAX_PARALLEL_BROKERS = 4
+
+# Upper bound for the copy buffer used when extracting ZIP members
+ZIP_COPY_BUFFER_SIZE = 1 << 20
+
 # Processing job tracking
-processing_jobs = {}
-processing_lock = threading.Lock()
+processing_jobs = OrderedDict()
+processing_lock = threading.Lock()  # guards adding/removing jobs, not field updates
+
+# Finished jobs beyond this count are dropped, oldest first
+MAX_TRACKED_JOBS = 256
+FINISHED_JOB_STATUSES = {'completed', 'partial', 'failed'}
+
+# Upload jobs run on a bounded pool instead of one thread per upload
+MAX_CONCURRENT_JOBS = 2
+job_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix='fundmate-job')
+
+# Cash summary currency columns and their display codes
+CASH_CURRENCY_COLUMNS = [('cny', 'CNY'), ('hkd', 'HKD'), ('usd', 'USD')]
+
+# Parquet columns the web views read (missing ones are skipped per file)
+CASH_COLUMNS = ['broker_name', 'broker', 'account_id', 'cny', 'hkd', 'usd', 'usd_total']
+POSITION_COLUMNS = [
+    'date', 'broker_name', 'broker', 'account_id', 'stock_code', 'symbol',
+    'raw_description', 'description', 'holding', 'quantity', 'multiplier',
+    'broker_price', 'broker_price_currency', 'final_price', 'optimized_price_currency',
+    'position_value_usd',
+]
+
+# Bump when the summary layout changes so stored sidecars are rebuilt
+SUMMARY_SIDECAR_VERSION = 1
+
 
 # Broker name patterns for automatic detection
 BROKER_PATTERNS = {
@@ -65,6 +143,20 @@ BROKER_PATTERNS = {
     'WB': [r'webull', r'^wb[_\-\s]', r'微牛'],
 }
 
+# All broker patterns in one regex, compiled once. Each broker is a lookahead branch
+# anchored at the start, so brokers are still tried in BROKER_PATTERNS order and the
+# first broker with any matching pattern wins (group _b<i> is BROKER_PATTERNS entry i).
+# Patterns are written in lowercase and matched against the lowercased filename,
+# which avoids case folding inside the matcher.
+_BROKER_NAMES = list(BROKER_PATTERNS)
+_BROKER_RE = re.compile(
+    '|'.join(
+        f"(?=.*?(?P<_b{i}>{'|'.join(f'(?:{p})' for p in patterns)}))"
+        for i, patterns in enumerate(BROKER_PATTERNS.values())
+    ),
+    re.DOTALL,
+)
+
 
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed"""
@@ -72,6 +164,7 @@ def allowed_file(filename: str) -> bool:
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
 
+@lru_cache(maxsize=2048)
 def detect_broker_from_filename(filename: str) -> Optional[str]:
     """
     Automatically detect broker name from filename using pattern matching
@@ -82,14 +175,10 @@ def detect_broker_from_filename(filename: str) -> Optional[str]:
     Returns:
         Detected broker name (uppercase) or None if not detected
     """
-    filename_lower = filename.lower()
-
-    for broker, patterns in BROKER_PATTERNS.items():
-        for pattern in patterns:
-            if re.search(pattern, filename_lower, re.IGNORECASE):
-                return broker
-
-    return None
+    match = _BROKER_RE.match(filename.lower())
+    if match is None:
+        return None
+    return _BROKER_NAMES[int(match.lastgroup[2:])]
 
 
 def extract_zip_file(zip_path: Path, extract_to: Path) -> List[Path]:
@@ -104,20 +193,29 @@ def extract_zip_file(zip_path: Path, extract_to: Path) -> List[Path]:
         List of paths to extracted files
     """
     extracted_files = []
+    extract_root = extract_to.resolve()
 
     try:
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            # Get list of files in ZIP
-            zip_files = zip_ref.namelist()
+            for info in zip_ref.infolist():
+                file_info = info.filename
 
-            for file_info in zip_files:
                 # Skip directories and hidden files
-                if file_info.endswith('/') or file_info.startswith('__MACOSX') or '/.DS_Store' in file_info:
+                if info.is_dir() or file_info.startswith('__MACOSX') or '/.DS_Store' in file_info:
                     continue
 
-                # Extract file
-                zip_ref.extract(file_info, extract_to)
+                # Refuse entries that would land outside the extraction directory
                 extracted_path = extract_to / file_info
+                if not extracted_path.resolve().is_relative_to(extract_root):
+                    continue
+
+                # Copy the member straight to disk with a buffer sized to the entry
+                extracted_path.parent.mkdir(parents=True, exist_ok=True)
+                if info.file_size == 0:
+                    extracted_path.touch()
+                else:
+                    with zip_ref.open(info) as src, open(extracted_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, min(info.file_size, ZIP_COPY_BUFFER_SIZE))
 
                 # Check if extracted file is allowed type
                 if extracted_path.is_file() and allowed_file(extracted_path.name):
@@ -161,7 +259,6 @@ def organize_files_by_broker(files: List[Path], date: str, base_dir: Path) -> Di
             # Move file to broker directory
             new_path = broker_dir / file_path.name
             if file_path != new_path:
-                import shutil
                 shutil.move(str(file_path), str(new_path))
                 file_path = new_path
 
@@ -174,18 +271,57 @@ def organize_files_by_broker(files: List[Path], date: str, base_dir: Path) -> Di
 
 def update_job_status(job_id: str, status: str, message: str = None,
                      progress: int = None, error: str = None, result: dict = None):
-    """Update processing job status"""
+    """
+    Update processing job status
+
+    Runs without processing_lock: the job dict is looked up and its fields are
+    applied with a single dict.update, both atomic under the GIL. The lock only
+    guards adding and removing jobs.
+    """
+    job = processing_jobs.get(job_id)
+    if job is None:
+        return
+
+    changes = {'status': status}
+    if message:
+        changes['message'] = message
+    if progress is not None:
+        changes['progress'] = progress
+    if error:
+        changes['error'] = error
+    if result:
+        changes['result'] = result
+    job.update(changes)
+
+
+def _record_job(job_id: str, job: dict) -> None:
+    """Register a new job, evicting the oldest finished jobs beyond MAX_TRACKED_JOBS"""
     with processing_lock:
-        if job_id in processing_jobs:
-            processing_jobs[job_id]['status'] = status
-            if message:
-                processing_jobs[job_id]['message'] = message
-            if progress is not None:
-                processing_jobs[job_id]['progress'] = progress
-            if error:
-                processing_jobs[job_id]['error'] = error
-            if result:
-                processing_jobs[job_id]['result'] = result
+        processing_jobs[job_id] = job
+        excess = len(processing_jobs) - MAX_TRACKED_JOBS
+        if excess <= 0:
+            return
+
+        # Jobs still pending or processing are never evicted
+        stale = [
+            old_id for old_id, old_job in processing_jobs.items()
+            if old_job['status'] in FINISHED_JOB_STATUSES
+        ][:excess]
+        for old_id in stale:
+            del processing_jobs[old_id]
+
+
+def _process_single_broker(job_id: str, broker: str, files: List[Path], date: str, upload_base_dir: str):
+    """Run the FundMate processing pipeline for one broker and return its unsaved results"""
+    from src.main import collect_results
+
+    update_job_status(job_id, 'processing', f'Extracting data for {broker} ({len(files)} file(s)) with LLM...')
+    return collect_results(
+        broker_folder=str(Path(upload_base_dir)),
+        date=date,
+        broker=broker,
+        max_workers=5
+    )
 
 
 def process_multiple_brokers(job_id: str, broker_files: Dict[str, List[Path]], date: str, upload_base_dir: str):
@@ -200,70 +336,50 @@ def process_multiple_brokers(job_id: str, broker_files: Dict[str, List[Path]], d
 
         update_job_status(job_id, 'processing', f'Starting batch processing for {total_brokers} broker(s)...', 5)
 
-        # Import main processing module
-        from src.main import main as process_main
-        import sys
+        # Extract brokers concurrently; each run is dominated by PDF conversion and LLM calls.
+        # Results are merged and saved once afterwards, since a save replaces the date's files.
+        completed = 0
+        outcomes = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(total_brokers, MAX_PARALLEL_BROKERS))) as executor:
+            futures = {
+                executor.submit(_process_single_broker, job_id, broker, files, date, upload_base_dir): broker
+                for broker, files in broker_files.items()
+            }
 
-        # Process each broker sequentially
-        for idx, (broker, files) in enumerate(broker_files.items(), 1):
-            try:
-                # Calculate progress based on broker index
-                base_progress = int((idx - 1) / total_brokers * 90)
-                broker_progress_range = int(90 / total_brokers)
-
-                update_job_status(
-                    job_id,
-                    'processing',
-                    f'Processing {broker} ({idx}/{total_brokers}) - {len(files)} file(s)...',
-                    base_progress + 10
-                )
-
-                # Prepare arguments for main processor
-                broker_folder = Path(upload_base_dir)
-
-                # Call the main processing function
-                old_argv = sys.argv
+            for future in as_completed(futures):
+                broker = futures[future]
+                completed += 1
                 try:
-                    sys.argv = [
-                        'web_app',
-                        str(broker_folder),
-                        '--date', date,
-                        '--broker', broker,
-                        '--max-workers', '5'
-                    ]
-
-                    update_job_status(
-                        job_id,
-                        'processing',
-                        f'Extracting data for {broker} with LLM...',
-                        base_progress + int(broker_progress_range * 0.5)
-                    )
-
-                    # Run the processing
-                    process_main()
-
-                    update_job_status(
-                        job_id,
-                        'processing',
-                        f'Completed {broker} ({idx}/{total_brokers})...',
-                        base_progress + broker_progress_range
-                    )
-
-                    processed_brokers.append(broker)
-
-                finally:
-                    sys.argv = old_argv
-
-            except Exception as e:
-                import traceback
-                error_msg = str(e)
-                failed_brokers.append({'broker': broker, 'error': error_msg})
-                update_job_status(
-                    job_id,
-                    'processing',
-                    f'Failed to process {broker}: {error_msg}. Continuing with others...',
-                    base_progress + broker_progress_range
-                )
+                    outcomes[broker] = future.result()
+                    message = f'Completed {broker} ({completed}/{total_brokers})...'
+                except Exception as e:
+                    outcomes[broker] = e
+                    message = f'Failed to process {broker}: {e}. Continuing with others...'
+
+                update_job_status(job_id, 'processing', message, 10 + int(completed / total_brokers * 85))
+
+        # Merge in upload order regardless of completion order
+        merged_results = []
+        merged_rates = {}
+        result_date = None
+        for broker in broker_files:
+            outcome = outcomes[broker]
+            if isinstance(outcome, Exception):
+                failed_brokers.append({'broker': broker, 'error': str(outcome)})
+                continue
+
+            broker_results, broker_rates, broker_date = outcome
+            processed_brokers.append(broker)
+            merged_results.extend(broker_results or [])
+            merged_rates.update(broker_rates or {})
+            result_date = result_date or broker_date
+
+        if merged_results:
+            from src.main import save_results
+
+            update_job_status(job_id, 'processing', 'Saving results...', 97)
+            save_results(merged_results, merged_rates, result_date or date)
+            store_summary(result_date or date)
 
         # Check if output was generated
         result_dir = Path(settings.result_dir) / date
@@ -315,43 +431,92 @@ def process_multiple_brokers(job_id: str, broker_files: Dict[str, List[Path]], d
 def get_available_dates() -> List[str]:
     """Get list of available dates with processed data"""
     result_dir = Path(settings.result_dir)
-    if not result_dir.exists():
-        return []
 
     dates = []
-    for date_dir in sorted(result_dir.iterdir(), reverse=True):
-        if date_dir.is_dir():
-            # Verify it has the required files
-            parquet_file = date_dir / f"cash_summary_{date_dir.name}.parquet"
-            if parquet_file.exists():
-                dates.append(date_dir.name)
+    try:
+        with os.scandir(result_dir) as it:
+            date_dirs = [entry for entry in it if entry.is_dir()]
+    except FileNotFoundError:
+        date_dirs = []
+    for entry in date_dirs:
+        # Verify it has the required files
+        if os.path.isfile(os.path.join(entry.path, f"cash_summary_{entry.name}.parquet")):
+            dates.append(entry.name)
+    dates.sort(reverse=True)
     return dates
 
 
+def _portfolio_files(date_dir: Path, date: str) -> Tuple[Path, Path, Path]:
+    """Return the cash, positions and metadata file paths for a date directory"""
+    return (
+        date_dir / f"cash_summary_{date}.parquet",
+        date_dir / f"positions_{date}.parquet",
+        date_dir / f"metadata_{date}.json",
+    )
+
+
 def load_portfolio_data(date: str) -> Dict:
-    """Load portfolio data for a specific date"""
+    """
+    Load portfolio data for a specific date
+
+    Results are cached per date and invalidated when any of the underlying
+    files changes. The returned DataFrames are shared between requests and
+    must be treated as read-only (copy before modifying).
+    """
     date_dir = Path(settings.result_dir) / date
 
     if not date_dir.exists():
         return None
 
-    data = {}
+    mtime_key = []
+    for path in _portfolio_files(date_dir, date):
+        try:
+            mtime_key.append(path.stat().st_mtime_ns)
+        except OSError:
+            mtime_key.append(None)
+
+    if all(m is None for m in mtime_key):
+        return None
+
+    return _load_portfolio_data_cached(str(date_dir), date, tuple(mtime_key))
+
+
+def _summary_file(date_dir: Path, date: str) -> Path:
+    """Return the path of the precomputed summary sidecar for a date directory"""
+    return date_dir / f"summary_{date}.json"
+
+
+def _read_parquet_columns(path: Path, columns: List[str]) -> "pd.DataFrame":
+    """Read only the listed columns that exist in a parquet file"""
+    # pandas/pyarrow are imported on first data access, not at app start-up
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    available = set(pq.read_schema(path).names)
+    return pd.read_parquet(path, columns=[c for c in columns if c in available])
+
+
+@lru_cache(maxsize=32)
+def _load_portfolio_data_cached(date_dir: str, date: str, mtime_key: Tuple) -> Dict:
+    """Read portfolio files from disk; mtime_key only participates in the cache key"""
+    cash_file, positions_file, metadata_file = _portfolio_files(Path(date_dir), date)
+    data = {
+        '_summary_path': _summary_file(Path(date_dir), date),
+        '_source_mtime_ns': max((m for m in mtime_key if m is not None), default=0),
+    }
 
     # Load cash summary
-    cash_file = date_dir / f"cash_summary_{date}.parquet"
     if cash_file.exists():
-        data['cash'] = pd.read_parquet(cash_file)
+        data['cash'] = _read_parquet_columns(cash_file, CASH_COLUMNS)
 
     # Load positions
-    positions_file = date_dir / f"positions_{date}.parquet"
     if positions_file.exists():
-        data['positions'] = pd.read_parquet(positions_file)
+        data['positions'] = _read_parquet_columns(positions_file, POSITION_COLUMNS)
 
     # Load metadata
-    metadata_file = date_dir / f"metadata_{date}.json"
     if metadata_file.exists():
-        with open(metadata_file, 'r') as f:
-            data['metadata'] = json.load(f)
+        with open(metadata_file, 'rb') as f:
+            data['metadata'] = _json_loads(f.read())
 
     return data
 
@@ -401,7 +566,7 @@ def positions():
     if not data or 'positions' not in data:
         return render_template('error.html', error="No positions data available")
 
-    positions_df = data['positions'].copy()
+    positions_df = data['positions']
 
     # Use broker_name column (actual column name in data)
     broker_col = 'broker_name' if 'broker_name' in positions_df.columns else 'broker'
@@ -413,8 +578,8 @@ def positions():
     # Get unique brokers for filter dropdown
     brokers = sorted(data['positions'][broker_col].unique().tolist())
 
-    # Convert to records for template
-    positions_list = positions_df.to_dict('records')
+    # Rows as namedtuples for the template (lighter than one dict per row)
+    positions_list = list(positions_df.itertuples(index=False, name='Row'))
 
     return render_template('positions.html',
                          date=selected_date,
@@ -424,6 +589,123 @@ def positions():
                          selected_broker=broker_filter)
 
 
+def _cash_column_totals(data: Dict, cash_df: "pd.DataFrame") -> Tuple[Dict[str, float], Dict[str, int]]:
+    """
+    Per-column cash totals and non-zero account counts
+
+    Uses the cash_totals/cash_accounts stored in metadata at save time, and
+    falls back to one reduction over the cash columns for older outputs.
+    """
+    metadata = data.get('metadata') or {}
+    totals = metadata.get('cash_totals')
+    account_counts = metadata.get('cash_accounts')
+    if isinstance(totals, dict) and isinstance(account_counts, dict):
+        return totals, account_counts
+
+    present = [
+        column for column in (*(c for c, _ in CASH_CURRENCY_COLUMNS), 'usd_total')
+        if column in cash_df.columns
+    ]
+    amounts = cash_df[present]
+    totals = amounts.sum().astype(float).to_dict()
+    account_counts = {column: int(count) for column, count in (amounts.abs() > 0).sum().items()}
+    return totals, account_counts
+
+
+def _to_float_array(column: "pd.Series", convert) -> "np.ndarray":
+    """Column as floats; numeric dtypes directly, other values through convert()"""
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+        return column.to_numpy(dtype=float, na_value=np.nan)
+    return np.array([convert(value) for value in column], dtype=float)
+
+
+def _parse_price(value) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _parse_holding(value) -> float:
+    try:
+        return float(str(value).replace(',', ''))
+    except (ValueError, AttributeError):
+        return 0.0
+
+
+def _parse_multiplier(value) -> float:
+    try:
+        return float(value) if value not in (None, '') else 1.0
+    except (ValueError, TypeError):
+        return 1.0
+
+
+def _position_values_usd(positions_df: "pd.DataFrame", usd_conversion) -> "np.ndarray":
+    """
+    Value positions as holding × price × multiplier converted to USD
+
+    The price is final_price, falling back to broker_price (and its currency)
+    where final_price is missing as None; rows without a price are worth 0.
+    """
+    import numpy as np
+    import pandas as pd
+
+    row_count = len(positions_df)
+    columns = positions_df.columns
+    empty = pd.Series([None] * row_count, index=positions_df.index, dtype=object)
+
+    final_price = positions_df['final_price'] if 'final_price' in columns else None
+    if final_price is None:
+        use_broker = np.ones(row_count, dtype=bool)
+    elif final_price.dtype == object:
+        use_broker = np.array([value is None for value in final_price], dtype=bool)
+    else:
+        use_broker = np.zeros(row_count, dtype=bool)
+
+    has_broker_price = 'broker_price' in columns
+    priced = ~use_broker if not has_broker_price else np.ones(row_count, dtype=bool)
+
+    price = _to_float_array(final_price, _parse_price) if final_price is not None else np.zeros(row_count)
+    currency = positions_df['optimized_price_currency'] if 'optimized_price_currency' in columns else empty
+    if has_broker_price and use_broker.any():
+        broker_price = positions_df['broker_price']
+        price = np.where(use_broker, _to_float_array(broker_price, _parse_price), price)
+        if broker_price.dtype == object:
+            priced &= ~(use_broker & np.array([value is None for value in broker_price], dtype=bool))
+        broker_currency = positions_df['broker_price_currency'] if 'broker_price_currency' in columns else empty
+        has_currency = (currency.notna() & (currency != '')).to_numpy()
+        currency = currency.where(~use_broker | has_currency, broker_currency)
+
+    holding = _to_float_array(positions_df['holding'], _parse_holding) if 'holding' in columns else np.zeros(row_count)
+    multiplier = (
+        _to_float_array(positions_df['multiplier'], _parse_multiplier)
+        if 'multiplier' in columns else np.ones(row_count)
+    )
+    raw_value = holding * price * multiplier
+
+    # One conversion lookup per distinct currency code
+    currency_codes = currency.where(currency.notna() & (currency != ''), 'USD').astype(str).str.upper()
+    conversions = {code: usd_conversion(code) for code in currency_codes.unique()}
+    rates = currency_codes.map({code: rate for code, (rate, _) in conversions.items()}).to_numpy(dtype=float)
+    divide = currency_codes.map({code: inv for code, (_, inv) in conversions.items()}).to_numpy(dtype=bool)
+    values = np.where(divide, raw_value / rates, raw_value * rates)
+    return np.where(priced, values, 0.0)
+
+
+def _sum_by_key(keys: "pd.Series", values: "pd.Series") -> Dict:
+    """Sum values per key (sorted by key, missing keys dropped) like groupby().sum()"""
+    import numpy as np
+
+    codes, uniques = keys.factorize(sort=True)
+    weights = values.to_numpy(dtype=float, na_value=0.0)
+    mask = codes >= 0
+    sums = np.bincount(codes[mask], weights=weights[mask], minlength=len(uniques))
+    return dict(zip(uniques.tolist(), sums.tolist()))
+
+
 @app.route('/cash')
 def cash():
     """Cash holdings view"""
@@ -439,31 +721,26 @@ def cash():
     if not data or 'cash' not in data:
         return render_template('error.html', error="No cash data available")
 
-    cash_df = data['cash'].copy()
+    cash_df = data['cash']
 
     # Calculate totals by currency (from separate CNY/HKD/USD columns)
     cash_by_currency = {}
     accounts_by_currency = {}
 
-    def _track_currency(column: str, code: str) -> None:
-        if column in cash_df.columns:
-            totals = cash_df[column].fillna(0)
-            total_amount = float(totals.sum())
-            if total_amount > 0:
-                cash_by_currency[code] = total_amount
-                accounts_by_currency[code] = int((totals.abs() > 0).sum())
-
-    for column, code in [('cny', 'CNY'), ('hkd', 'HKD'), ('usd', 'USD')]:
-        _track_currency(column, code)
+    totals, account_counts = _cash_column_totals(data, cash_df)
+    for column, code in CASH_CURRENCY_COLUMNS:
+        if totals.get(column, 0.0) > 0:
+            cash_by_currency[code] = totals[column]
+            accounts_by_currency[code] = int(account_counts.get(column, 0))
 
     # Calculate totals by broker (use usd_total column)
     broker_col = 'broker_name' if 'broker_name' in cash_df.columns else 'broker'
     if 'usd_total' in cash_df.columns:
-        cash_by_broker = cash_df.groupby(broker_col)['usd_total'].sum().to_dict()
+        cash_by_broker = _sum_by_key(cash_df[broker_col], cash_df['usd_total'])
     else:
         cash_by_broker = {}
 
-    cash_list = cash_df.to_dict('records')
+    cash_list = list(cash_df.itertuples(index=False, name='Row'))
 
     return render_template('cash.html',
                          date=selected_date,
@@ -558,14 +835,25 @@ def upload_files():
         for file in files:
             if file and file.filename:
                 filename = secure_filename(file.filename)
-                filepath = temp_dir / filename
-                file.save(str(filepath))
 
                 # Check if it's a ZIP file
                 if filename.lower().endswith('.zip'):
+                    filepath = temp_dir / filename
+                    file.save(str(filepath))
                     zip_files.append(filepath)
+                    continue
+
+                # Write straight to the broker directory when the broker is already known,
+                # so the upload is not saved to temp and then moved
+                broker = detect_broker_from_filename(filename) if auto_detect else manual_broker
+                if broker:
+                    target_dir = app.config['UPLOAD_FOLDER'] / broker / date
+                    target_dir.mkdir(parents=True, exist_ok=True)
                 else:
-                    all_files.append(filepath)
+                    target_dir = temp_dir
+                filepath = target_dir / filename
+                file.save(str(filepath))
+                all_files.append(filepath)
 
         # Extract ZIP files
         for zip_path in zip_files:
@@ -602,36 +890,34 @@ def upload_files():
             broker_dir = app.config['UPLOAD_FOLDER'] / manual_broker / date
             broker_dir.mkdir(parents=True, exist_ok=True)
 
-            # Move all files to broker directory
-            import shutil
+            # Move extracted files to broker directory (direct uploads are already there)
+            broker_paths = []
             for file_path in all_files:
                 new_path = broker_dir / file_path.name
-                shutil.move(str(file_path), str(new_path))
+                if file_path != new_path:
+                    shutil.move(str(file_path), str(new_path))
+                broker_paths.append(new_path)
 
-            broker_files = {manual_broker: all_files}
+            broker_files = {manual_broker: broker_paths}
 
         # Initialize job status
-        with processing_lock:
-            processing_jobs[job_id] = {
-                'status': 'pending',
-                'brokers': list(broker_files.keys()),
-                'date': date,
-                'broker_files': {broker: [str(f) for f in files] for broker, files in broker_files.items()},
-                'progress': 0,
-                'message': 'Job queued',
-                'created_at': datetime.now().isoformat(),
-                'result': None,
-                'error': None,
-                'auto_detect': auto_detect
-            }
+        _record_job(job_id, {
+            'status': 'pending',
+            'brokers': list(broker_files.keys()),
+            'date': date,
+            'broker_files': {broker: [str(f) for f in files] for broker, files in broker_files.items()},
+            'progress': 0,
+            'message': 'Job queued',
+            'created_at': datetime.now().isoformat(),
+            'result': None,
+            'error': None,
+            'auto_detect': auto_detect
+        })
 
-        # Start processing in background thread
-        thread = threading.Thread(
-            target=process_multiple_brokers,
-            args=(job_id, broker_files, date, str(app.config['UPLOAD_FOLDER']))
+        # Queue processing on the shared job pool; the job stays 'pending' until a slot frees up
+        job_executor.submit(
+            process_multiple_brokers, job_id, broker_files, date, str(app.config['UPLOAD_FOLDER'])
         )
-        thread.daemon = True
-        thread.start()
 
         broker_list = ', '.join(broker_files.keys())
         total_files = sum(len(files) for files in broker_files.values())
@@ -645,7 +931,6 @@ def upload_files():
 
     except Exception as e:
         # Clean up temp directory on error
-        import shutil
         if temp_dir.exists():
             shutil.rmtree(temp_dir)
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
@@ -654,8 +939,7 @@ def upload_files():
 @app.route('/api/jobs/<job_id>')
 def get_job_status(job_id):
     """Get processing job status"""
-    with processing_lock:
-        job = processing_jobs.get(job_id)
+    job = processing_jobs.get(job_id)
 
     if not job:
         return jsonify({'error': 'Job not found'}), 404
@@ -666,18 +950,18 @@ def get_job_status(job_id):
 @app.route('/api/jobs')
 def list_jobs():
     """List all processing jobs"""
-    with processing_lock:
-        jobs_list = [
-            {
-                'job_id': job_id,
-                'broker': job.get('broker'),  # For old single-broker jobs
-                'brokers': job.get('brokers'),  # For new multi-broker jobs
-                'date': job['date'],
-                'status': job['status'],
-                'created_at': job['created_at']
-            }
-            for job_id, job in processing_jobs.items()
-        ]
+    # Snapshot the items so concurrent job creation cannot change the dict mid-iteration
+    jobs_list = [
+        {
+            'job_id': job_id,
+            'broker': job.get('broker'),  # For old single-broker jobs
+            'brokers': job.get('brokers'),  # For new multi-broker jobs
+            'date': job['date'],
+            'status': job['status'],
+            'created_at': job['created_at']
+        }
+        for job_id, job in tuple(processing_jobs.items())
+    ]
 
     # Sort by created_at descending
     jobs_list.sort(key=lambda x: x['created_at'], reverse=True)
@@ -688,6 +972,11 @@ def list_jobs():
 @app.route('/api/summary/<date>')
 def api_summary(date):
     """API endpoint for summary data"""
+    try:
+        datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
     data = load_portfolio_data(date)
 
     if not data:
@@ -698,8 +987,74 @@ def api_summary(date):
     return jsonify(summary)
 
 
+def _read_summary_sidecar(data: Dict) -> Optional[Dict]:
+    """Return the stored summary if it was built from the current data files"""
+    summary_path = data.get('_summary_path')
+    if summary_path is None:
+        return None
+    try:
+        with open(summary_path, 'rb') as f:
+            payload = _json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(payload, dict)
+            or payload.get('version') != SUMMARY_SIDECAR_VERSION
+            or payload.get('source_mtime_ns') != data.get('_source_mtime_ns')):
+        return None
+    return payload.get('summary')
+
+
+def _write_summary_sidecar(summary_path: Path, payload: Dict) -> None:
+    """Persist a computed summary next to the data files (best effort)"""
+    tmp_path = summary_path.with_name(f"{summary_path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_json_dumps(payload))
+        os.replace(tmp_path, summary_path)
+    except (OSError, TypeError, ValueError):
+        tmp_path.unlink(missing_ok=True)
+
+
+def store_summary(date: str) -> None:
+    """Precompute the summary sidecar for freshly saved results of a date"""
+    data = load_portfolio_data(date)
+    if not data:
+        return
+    _write_summary_sidecar(data['_summary_path'], {
+        'version': SUMMARY_SIDECAR_VERSION,
+        'source_mtime_ns': data['_source_mtime_ns'],
+        'summary': calculate_summary(data),
+    })
+
+
 def calculate_summary(data: Dict) -> Dict:
+    """
+    Return portfolio summary statistics
+
+    Data loaded by load_portfolio_data carries a summary sidecar path; a
+    sidecar written by store_summary for the same data files is read back
+    instead of recomputing. The summary is also kept on the (cached) data
+    dict, so later requests for the same date skip even the sidecar read.
+    Treat the returned dict as read-only.
+    """
+    if not isinstance(data, dict) or data.get('_summary_path') is None:
+        return _compute_summary(data)
+
+    summary = data.get('_summary')
+    if summary is not None:
+        return summary
+
+    summary = _read_summary_sidecar(data)
+    if summary is None:
+        summary = _compute_summary(data)
+    data['_summary'] = summary
+    return summary
+
+
+def _compute_summary(data: Dict) -> Dict:
     """Calculate portfolio summary statistics."""
+    import pandas as pd
+
     summary = {
         'total_cash_usd': 0.0,
         'total_positions_value_usd': 0.0,
@@ -723,23 +1078,20 @@ def calculate_summary(data: Dict) -> Dict:
         }
     exchange_rates.setdefault('USD', 1.0)
 
-    def convert_to_usd(amount: float, currency: Optional[str]) -> float:
-        """Best-effort conversion helper that tolerates legacy rate formats."""
-        if amount in (None, float('nan')):
-            return 0.0
-        currency_code = (currency or 'USD').upper()
+    def usd_conversion(currency_code: str) -> Tuple[float, bool]:
+        """Best-effort (rate, divide) to reach USD, tolerating legacy rate formats."""
         if currency_code == 'USD':
-            return float(amount)
+            return 1.0, False
 
         rate = exchange_rates.get(currency_code)
         if rate is None or rate == 0:
-            return float(amount)
+            return 1.0, False
 
         # Legacy datasets stored currency-per-USD (e.g. 7.85); detect and invert when needed.
         if rate > 1.0 and currency_code not in {'KWD', 'BHD', 'OMR', 'JOD', 'KYD', 'GIP'}:
-            return float(amount) / rate
+            return rate, True
 
-        return float(amount) * rate
+        return rate, False
 
     # Cash summary
     cash_df = data.get('cash')
@@ -748,19 +1100,19 @@ def calculate_summary(data: Dict) -> Dict:
         if broker_col in cash_df.columns:
             summary['broker_count'] = int(cash_df[broker_col].nunique())
 
-        for currency_col, currency_code in [('cny', 'CNY'), ('hkd', 'HKD'), ('usd', 'USD')]:
-            if currency_col in cash_df.columns:
-                total_amount = float(cash_df[currency_col].fillna(0).sum())
-                if total_amount:
-                    summary['cash_by_currency'][currency_code] = total_amount
+        totals, _ = _cash_column_totals(data, cash_df)
+        for currency_col, currency_code in CASH_CURRENCY_COLUMNS:
+            if totals.get(currency_col):
+                summary['cash_by_currency'][currency_code] = totals[currency_col]
 
-        if 'usd_total' in cash_df.columns:
-            summary['total_cash_usd'] = float(cash_df['usd_total'].fillna(0).sum())
+        summary['total_cash_usd'] = totals.get('usd_total', 0.0)
 
     # Positions summary
     positions_df = data.get('positions')
     if positions_df is not None and not positions_df.empty:
-        positions_df = positions_df.copy()
+        # Shallow copy: position_value_usd is only ever replaced as a whole column,
+        # so the cached frame is left untouched without duplicating its data
+        positions_df = positions_df.copy(deep=False)
         summary['position_count'] = len(positions_df)
 
         broker_col = 'broker_name' if 'broker_name' in positions_df.columns else 'broker'
@@ -776,49 +1128,17 @@ def calculate_summary(data: Dict) -> Dict:
                 positions_df['position_value_usd'], errors='coerce'
             ).fillna(0.0)
         else:
-            def compute_row_value(row):
-                price = row.get('final_price') if 'final_price' in row else None
-                price_currency = row.get('optimized_price_currency')
-                if price is None and 'broker_price' in row:
-                    price = row.get('broker_price')
-                    price_currency = price_currency or row.get('broker_price_currency')
-
-                if price is None:
-                    return 0.0
-
-                holding = row.get('holding', 0)
-                multiplier = row.get('multiplier', 1)
-
-                try:
-                    holding_val = float(str(holding).replace(',', ''))
-                except (ValueError, AttributeError):
-                    holding_val = 0.0
-
-                try:
-                    price_val = float(price)
-                except (ValueError, TypeError):
-                    price_val = 0.0
-
-                try:
-                    multiplier_val = float(multiplier) if multiplier not in (None, '') else 1.0
-                except (ValueError, TypeError):
-                    multiplier_val = 1.0
-
-                raw_value = holding_val * price_val * multiplier_val
-                return convert_to_usd(raw_value, price_currency)
-
-            positions_df['position_value_usd'] = positions_df.apply(compute_row_value, axis=1)
+            positions_df['position_value_usd'] = _position_values_usd(positions_df, usd_conversion)
 
         summary['total_positions_value_usd'] = float(positions_df['position_value_usd'].sum())
 
         # Build top positions list
         if summary['total_positions_value_usd'] > 0:
+            # Partial selection of the 10 largest instead of sorting every position
             top_df = positions_df[
                 positions_df['position_value_usd'] > 0
-            ].copy()
+            ].nlargest(10, 'position_value_usd')
             if not top_df.empty:
-                top_df.sort_values('position_value_usd', ascending=False, inplace=True)
-                top_df = top_df.head(10)
                 total_portfolio_value = summary['total_positions_value_usd'] + summary['total_cash_usd']
                 summary['top_positions'] = [
                     {
@@ -832,7 +1152,7 @@ def calculate_summary(data: Dict) -> Dict:
                             if total_portfolio_value else 0.0
                         )
                     }
-                    for _, row in top_df.iterrows()
+                    for row in top_df.to_dict('records')
                 ]
 
     summary['total_portfolio_value_usd'] = (
@@ -875,21 +1195,40 @@ def calculate_comparison(data1: Dict, data2: Dict, date1: str, date2: str) -> Di
     return comparison
 
 
+# Display symbols for format_currency; other currencies are shown by code
+CURRENCY_SYMBOLS = {
+    'USD': '$',
+    'HKD': 'HK$',
+    'CNY': '¥'
+}
+
+
+# Formatted strings are memoized: tables repeat the same values (totals, zero
+# balances, common prices), so each distinct value is formatted once
+@lru_cache(maxsize=4096, typed=True)
+def _format_currency(value, currency: str) -> str:
+    symbol = CURRENCY_SYMBOLS.get(currency, currency + ' ')
+
+    return f"{symbol}{value:,.2f}"
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _format_number(value) -> str:
+    return f"{value:,.2f}"
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _format_percent(value) -> str:
+    return f"{value:.2f}%"
+
+
 @app.template_filter('format_currency')
 def format_currency_filter(value, currency='USD'):
     """Format number as currency"""
     if value is None:
         return 'N/A'
 
-    currency_symbols = {
-        'USD': '$',
-        'HKD': 'HK$',
-        'CNY': '¥'
-    }
-
-    symbol = currency_symbols.get(currency, currency + ' ')
-
-    return f"{symbol}{value:,.2f}"
+    return _format_currency(value, currency)
 
 
 @app.template_filter('format_number')
@@ -898,7 +1237,7 @@ def format_number_filter(value):
     if value is None:
         return 'N/A'
 
-    return f"{value:,.2f}"
+    return _format_number(value)
 
 
 @app.template_filter('format_percent')
@@ -907,13 +1246,8 @@ def format_percent_filter(value):
     if value is None:
         return 'N/A'
 
-    return f"{value:.2f}%"
+    return _format_percent(value)
 
 
 if __name__ == '__main__':
-    # Create necessary directories within the package for local development
-    TEMPLATE_DIR.mkdir(parents=True, exist_ok=True)
-    (STATIC_DIR / 'css').mkdir(parents=True, exist_ok=True)
-    (STATIC_DIR / 'js').mkdir(parents=True, exist_ok=True)
-
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -10,31 +10,36 @@ from pathlib import Path
 
 # Add src directory to Python path for imports
 project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root / "src"))
+_src = str(project_root / "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
 
+# Shared data directory; path fixtures below are session-scoped since their values never change
+DATA_DIR = project_root / "data"
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def test_date_0228():
     """Test date for 0228 dataset"""
     return "2025-02-28"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_date_0630():
     """Test date for 0630 dataset"""
     return "2025-06-30"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def broker_folder_0228():
     """Path to 0228 broker data folder"""
-    return str(project_root / "data" / "20250228_Statement")
+    return str(DATA_DIR / "20250228_Statement")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def broker_folder_0630():
     """Path to 0630 broker data folder"""
-    return str(project_root / "data" / "20250630_Statement")
+    return str(DATA_DIR / "20250630_Statement")
 
 
 @pytest.fixture
@@ -61,37 +66,37 @@ def project_root_path():
     return project_root
 
 
-@pytest.fixture
-def tc_base_folder(project_root_path):
+@pytest.fixture(scope="session")
+def tc_base_folder():
     """Path to base statements used for TC mode regression"""
-    return str(project_root_path / "data" / "20250718_Statement")
+    return str(DATA_DIR / "20250718_Statement")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def tc_base_date():
     """Base date for TC regression."""
     return "2025-07-18"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def tc_target_date():
     """Target date for TC regression."""
     return "2025-07-22"
 
 
-@pytest.fixture
-def tc_trade_confirmation_folder(project_root_path):
+@pytest.fixture(scope="session")
+def tc_trade_confirmation_folder():
     """Path to archived trade confirmation Excel files."""
-    return str(project_root_path / "data" / "archives" / "TC")
+    return str(DATA_DIR / "archives" / "TC")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def tc_expected_csv(project_root_path, tc_target_date):
     """Baseline CSV generated from known-good TC run."""
     return project_root_path / "test" / "fixtures" / "tc_expected" / f"portfolio_details_{tc_target_date}.csv"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def tc_base_fixture_dir(project_root_path, tc_base_date):
     """Directory containing saved base portfolio outputs for TC regression."""
     return project_root_path / "test" / "fixtures" / "tc_base" / tc_base_date
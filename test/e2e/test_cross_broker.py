@@ -56,10 +56,8 @@ class TestCrossBrokerAggregation:
         # Find stocks that appear in multiple brokers
         # For options, use raw_description to distinguish different contracts
         # For regular stocks, use stock_code
-        data_rows['unique_key'] = data_rows.apply(
-            lambda row: row['raw_description'] if 'OPTION' in str(row['stock_code']).upper() else row['stock_code'],
-            axis=1
-        )
+        is_option = data_rows['stock_code'].astype(str).str.upper().str.contains('OPTION', regex=False)
+        data_rows['unique_key'] = data_rows['raw_description'].where(is_option, data_rows['stock_code'])
         
         stock_counts = data_rows['unique_key'].value_counts()
         cross_broker_stocks = stock_counts[stock_counts > 1]
@@ -1,15 +1,19 @@
 """
 Unit tests for exchange rate caching mechanism.
-Focus on cache save/load and lazy loading to reduce API calls.
+Focus on cache save/load and lazy loading to reduce API calls,
+and on sharing one handler between concurrent broker runs.
 """
 
 import pytest
 import json
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
+import exchange_rate_handler
 from exchange_rate_handler import ExchangeRateHandler
 
 
@@ -46,6 +50,36 @@ class TestExchangeRateCaching:
         assert handler._load_rate_from_json("HKD", "USD", "2025-02-28") == 0.128
         assert handler._load_rate_from_json("CNY", "USD", "2025-06-30") == 0.140
     
+    def test_rate_caching_parses_file_once(self, tmp_path, monkeypatch):
+        """Repeated lookups reuse the parsed JSON cache file"""
+        cache_file = tmp_path / "test_cache.json"
+        cache_file.write_text(json.dumps({"CNY_USD_2025-02-28": 0.139, "HKD_USD_2025-02-28": 0.128}))
+        handler = ExchangeRateHandler(cache_file=str(cache_file))
+        
+        loads = []
+        real_load = json.load
+        monkeypatch.setattr(json, "load", lambda f: loads.append(f) or real_load(f))
+        
+        assert handler._load_rate_from_json("CNY", "USD", "2025-02-28") == 0.139
+        assert handler._load_rate_from_json("HKD", "USD", "2025-02-28") == 0.128
+        assert handler._load_rate_from_json("EUR", "USD", "2025-02-28") is None
+        assert len(loads) == 1
+    
+    def test_rate_caching_feather_migrates_json(self, tmp_path):
+        """Feather cache is seeded from a legacy JSON file and round-trips"""
+        (tmp_path / "test_cache.json").write_text(json.dumps({"CNY_USD_2025-02-28": 0.139}))
+        cache_file = tmp_path / "test_cache.feather"
+        handler = ExchangeRateHandler(cache_file=str(cache_file))
+        
+        assert handler._load_rate_from_json("CNY", "USD", "2025-02-28") == 0.139
+        
+        handler._save_rate_to_json("HKD", "USD", "2025-02-28", 0.128)
+        assert cache_file.exists()
+        
+        reloaded = ExchangeRateHandler(cache_file=str(cache_file))
+        assert reloaded._load_rate_from_json("CNY", "USD", "2025-02-28") == 0.139
+        assert reloaded._load_rate_from_json("HKD", "USD", "2025-02-28") == 0.128
+    
     def test_rate_caching_load_nonexistent(self, tmp_path):
         """Loading non-existent rate returns None"""
         cache_file = tmp_path / "test_cache.json"
@@ -144,3 +178,62 @@ class TestCacheStatistics:
         assert len(handler._rate_cache) == 0
         assert not cache_file.exists()  # JSON cache deleted
 
+
+class _FakeRateSource:
+    """Stand-in for the exchange rate API that records overlapping requests"""
+    
+    RATES = {'HKD': 0.128, 'CNY': 0.139}
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.overlaps = 0
+        self.calls = []
+        self.pause = threading.Event()  # Never set; time.sleep is patched out in the test
+    
+    def get(self, url, timeout=None):
+        currency = url.split('&from=')[1].split('&')[0]
+        with self.lock:
+            self.active += 1
+            self.overlaps += self.active > 1
+            self.calls.append(currency)
+        # Hold the request open long enough for another broker thread to arrive
+        self.pause.wait(0.05)
+        with self.lock:
+            self.active -= 1
+        return _FakeResponse({'success': True, 'result': self.RATES[currency]})
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self._data = data
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return self._data
+
+
+class TestConcurrentBrokers:
+    """Test one handler shared by broker runs on several threads"""
+    
+    def test_concurrent_brokers_fetch_each_rate_once(self, tmp_path, monkeypatch):
+        """Two broker runs share fetched rates, take turns on the API and keep every rate on disk"""
+        source = _FakeRateSource()
+        monkeypatch.setattr(exchange_rate_handler.requests, "get", source.get)
+        monkeypatch.setattr(exchange_rate_handler.time, "sleep", lambda seconds: None)
+        cache_file = tmp_path / "rates.feather"
+        handler = ExchangeRateHandler(cache_file=str(cache_file))
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            rates = list(executor.map(lambda _: handler.get_rates_legacy("2025-02-28"), range(2)))
+        
+        expected = {'USD': 1.0, 'HKD': 0.128, 'CNY': 0.139}
+        assert rates == [expected, expected]
+        assert sorted(source.calls) == ['CNY', 'HKD']
+        assert source.overlaps == 0
+        assert ExchangeRateHandler(cache_file=str(cache_file))._load_file_cache() == {
+            ('HKD', 'USD', '2025-02-28'): 0.128,
+            ('CNY', 'USD', '2025-02-28'): 0.139,
+        }
@@ -0,0 +1,56 @@
+"""
+Unit tests for the persistent price cache.
+Focus on (symbol, date) round-trips and expiry of same-day prices.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from price_cache import PriceCache
+
+
+class TestPriceCache:
+    """Test SQLite-backed price cache"""
+
+    def test_put_and_get(self, tmp_path):
+        """Stored prices are returned for the same date only"""
+        cache = PriceCache(db_file=str(tmp_path / "prices.db"))
+
+        cache.put_many("2025-07-22", [
+            ("COIN", 404.44, "USD", "Futu"),
+            ("01263", 7.8, "HKD", "Futu"),
+        ])
+
+        hits = cache.get_many(["COIN", "01263", "DUOL"], "2025-07-22")
+        assert hits == {
+            "COIN": (404.44, "USD", "Futu"),
+            "01263": (7.8, "HKD", "Futu"),
+        }
+        assert cache.get_many(["COIN"], "2025-07-21") == {}
+
+    def test_missing_file_is_empty(self, tmp_path):
+        """A fresh cache returns no hits"""
+        cache = PriceCache(db_file=str(tmp_path / "nested" / "prices.db"))
+        assert cache.get_many(["COIN"], "2025-07-22") == {}
+
+    def test_max_age_expires_entries(self, tmp_path):
+        """Entries older than max_age_seconds are ignored"""
+        cache = PriceCache(db_file=str(tmp_path / "prices.db"))
+        cache.put_many("2025-07-22", [("COIN", 404.44, "USD", "Futu")])
+
+        assert "COIN" in cache.get_many(["COIN"], "2025-07-22", max_age_seconds=3600)
+        assert cache.get_many(["COIN"], "2025-07-22", max_age_seconds=-1) == {}
+
+    def test_clear(self, tmp_path):
+        """Clearing removes the database file"""
+        db_file = tmp_path / "prices.db"
+        cache = PriceCache(db_file=str(db_file))
+        cache.put_many("2025-07-22", [("COIN", 404.44, "USD", "Futu")])
+
+        cache.clear()
+
+        assert not db_file.exists()
+        assert cache.get_many(["COIN"], "2025-07-22") == {}
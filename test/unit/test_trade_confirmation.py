@@ -0,0 +1,138 @@
+"""
+Unit tests for trade confirmation application.
+Focus on holdings bookkeeping when positions are closed and opened in one batch,
+on the price lookup rate limiter and retries, and on the optional price cache.
+"""
+
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import src.trade_confirmation_processor as tc_module
+from src.broker_processor import ProcessedResult
+from src.position import Position
+from src.price_cache import PriceCache
+from src.trade_confirmation_processor import TradeConfirmationProcessor, Transaction, _TokenBucket
+
+
+def _txn(stock_code, direction, quantity):
+    return Transaction(
+        date="2025-07-22", broker="HTI", stock_code=stock_code, direction=direction,
+        quantity=quantity, avg_price=1.0, amount_usd=1.0, currency="USD", market="US"
+    )
+
+
+def _price_processor(price_cache):
+    # No price fetcher or persistence needed for updating prices
+    processor = TradeConfirmationProcessor.__new__(TradeConfirmationProcessor)
+    processor.price_cache = price_cache
+    processor.price_failures = []
+    return processor
+
+
+def _price_result():
+    return ProcessedResult(
+        broker_name="HTI", account_id="A1", cash_data={"USD": 0.0},
+        positions=[Position(stock_code="AAPL", holding=10.0, broker="HTI")]
+    )
+
+
+class TestApplyTransactions:
+    """Test staged holdings in _apply_broker_transactions"""
+
+    def test_sell_out_then_buy_new_positions(self):
+        """New positions opened after sell-outs keep their own holdings"""
+        # No price fetcher or cache needed for applying transactions
+        processor = TradeConfirmationProcessor.__new__(TradeConfirmationProcessor)
+        result = ProcessedResult(
+            broker_name="HTI", account_id="A1", cash_data={"USD": 0.0},
+            positions=[Position(stock_code=f"S{i}", holding=float(i + 1), broker="HTI") for i in range(5)]
+        )
+
+        transactions = (
+            [_txn(f"S{i}", "SELL", i + 1) for i in range(5)]
+            + [_txn(f"N{i}", "BUY", 10 + i) for i in range(5)]
+            + [_txn(f"N{i}", "BUY", 1) for i in range(5)]
+        )
+        processor._apply_broker_transactions(result, transactions)
+
+        assert [(p.stock_code, p.holding) for p in result.positions] == [
+            ("N0", 11.0), ("N1", 12.0), ("N2", 13.0), ("N3", 14.0), ("N4", 15.0)
+        ]
+
+
+class TestTokenBucket:
+    """Test the async price lookup rate limiter"""
+
+    def test_rate_below_one_grants_a_token(self):
+        """A bucket slower than 1/s still allows one call, then waits"""
+        bucket = _TokenBucket(0.5)
+
+        asyncio.run(asyncio.wait_for(bucket.acquire(), timeout=1))
+
+        assert bucket.tokens < 1
+
+    def test_us_option_lookup_retried(self, monkeypatch):
+        """A transient Futu error on a US option is retried through the limiter"""
+        calls = []
+
+        def _flaky_us_option_close(raw_description, date):
+            calls.append(raw_description)
+            if len(calls) == 1:
+                raise ConnectionError("connection lost")
+            return 2.5, 100
+
+        monkeypatch.setattr(tc_module, "fetch_us_option_close", _flaky_us_option_close)
+        monkeypatch.setattr(tc_module, "PRICE_FETCH_BACKOFF_MAX", 0)
+
+        fetched = asyncio.run(TradeConfirmationProcessor._fetch_prices(
+            [("AMZN US 06/18/26 C300", "AMZN US 06/18/26 C300")], "2025-07-22"
+        ))
+
+        assert fetched == [("AMZN US 06/18/26 C300", (2.5, "USD"))]
+        assert len(calls) == 2
+
+    def test_non_positive_rate_rejected(self):
+        """A zero rate is refused instead of dividing by zero later"""
+        with pytest.raises(ValueError):
+            _TokenBucket(0)
+
+
+class TestPriceCache:
+    """Test the optional persisted price cache in _update_prices"""
+
+    @pytest.fixture
+    def fetch_calls(self, monkeypatch):
+        calls = []
+
+        def _fake_get_stock_price(symbol, date, *args, **kwargs):
+            calls.append(symbol)
+            return 1.5, "USD"
+
+        monkeypatch.setattr(tc_module, "get_stock_price", _fake_get_stock_price)
+        return calls
+
+    def test_disabled_cache_always_fetches(self, fetch_calls):
+        """Without a cache every run goes through the fetch path"""
+        processor = _price_processor(None)
+
+        for _ in range(2):
+            result = _price_result()
+            processor._update_prices([result], "2025-07-22", {})
+            assert result.positions[0].final_price == 1.5
+
+        assert fetch_calls == ["AAPL", "AAPL"]
+
+    def test_injected_cache_reused(self, fetch_calls, tmp_path):
+        """An injected cache serves prices fetched by an earlier run"""
+        processor = _price_processor(PriceCache(str(tmp_path / "prices.db")))
+
+        for _ in range(2):
+            result = _price_result()
+            processor._update_prices([result], "2025-07-22", {})
+            assert result.positions[0].final_price == 1.5
+
+        assert fetch_calls == ["AAPL"]
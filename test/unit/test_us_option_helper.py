@@ -0,0 +1,124 @@
+"""
+Unit tests for US option description parsing.
+Focus on Futu option code construction from parsed strikes,
+and on reconnecting the shared quote context after a failure.
+"""
+
+import pytest
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import us_option_price_helper
+from us_option_price_helper import parse_us_option_description, _build_futu_option_code
+
+
+class TestUSOptionCode:
+    """Test Futu code construction for US options"""
+
+    def test_futu_code_formats(self):
+        """All broker formats produce the same Futu code layout"""
+        assert _build_futu_option_code(parse_us_option_description("AMZN US 06/18/26 C300")) == "US.AMZN260618C300000"
+        assert _build_futu_option_code(parse_us_option_description("AMZN 18JUN26 300 C")) == "US.AMZN260618C300000"
+        assert _build_futu_option_code(parse_us_option_description("TRON 20260116 PUT 15.0")) == "US.TRON260116P15000"
+
+    def test_strike_thousandths_exact(self):
+        """Strikes that are inexact as floats keep their exact thousandths"""
+        info = parse_us_option_description("SPY 20260116 CALL 1.005")
+        assert info['strike_thousandths'] == 1005
+        assert _build_futu_option_code(info) == "US.SPY260116C01005"
+
+
+def _fake_futu(context_cls):
+    # Stand-in for the lazily imported futu module, so futu need not be installed
+    return SimpleNamespace(
+        OpenQuoteContext=context_cls, RET_OK=0,
+        KLType=SimpleNamespace(K_DAY="K_DAY"), AuType=SimpleNamespace(QFQ="qfq")
+    )
+
+
+class _BrokenQuoteContext:
+    """Stand-in for futu.OpenQuoteContext whose requests always fail"""
+
+    opened = []
+
+    def __init__(self, host=None, port=None):
+        self.closed = False
+        _BrokenQuoteContext.opened.append(self)
+
+    def request_history_kline(self, **kwargs):
+        raise ConnectionError("connection lost")
+
+    def close(self):
+        self.closed = True
+
+
+class _SlowQuoteContext:
+    """Stand-in quote context that records overlapping requests; the first request fails"""
+
+    lock = threading.Lock()
+    active = 0
+    overlaps = 0
+    requests = 0
+
+    def __init__(self, host=None, port=None):
+        self.closed = False
+
+    def request_history_kline(self, **kwargs):
+        cls = _SlowQuoteContext
+        with cls.lock:
+            cls.active += 1
+            cls.overlaps += cls.active > 1
+            cls.requests += 1
+            fail = cls.requests == 1
+        time.sleep(0.01)
+        with cls.lock:
+            cls.active -= 1
+        assert not self.closed, "request ran on a closed context"
+        if fail:
+            raise ConnectionError("connection lost")
+        return 0, SimpleNamespace(empty=False, iloc=[{'close': 1.5}])
+
+    def close(self):
+        self.closed = True
+
+
+class TestQuoteContext:
+    """Test the shared Futu quote context"""
+
+    def test_failed_request_reconnects(self, monkeypatch):
+        """A context that raised is closed and replaced on the next lookup"""
+        monkeypatch.setitem(sys.modules, "futu", _fake_futu(_BrokenQuoteContext))
+        monkeypatch.setattr(us_option_price_helper, "_quote_ctx", None)
+        _BrokenQuoteContext.opened = []
+
+        for _ in range(2):
+            assert us_option_price_helper.get_us_option_price_from_futu(
+                "AMZN", "AMZN US 06/18/26 C300", "2025-07-18"
+            ) == (None, None)
+
+        assert len(_BrokenQuoteContext.opened) == 2
+        assert all(ctx.closed for ctx in _BrokenQuoteContext.opened)
+        assert us_option_price_helper._quote_ctx is None
+
+    def test_concurrent_requests_take_turns(self, monkeypatch):
+        """Threads share the context one request at a time, even when one fails"""
+        monkeypatch.setitem(sys.modules, "futu", _fake_futu(_SlowQuoteContext))
+        monkeypatch.setattr(us_option_price_helper, "_quote_ctx", None)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            prices = list(executor.map(
+                lambda _: us_option_price_helper.get_us_option_price_from_futu(
+                    "AMZN", "AMZN US 06/18/26 C300", "2025-07-18"
+                ),
+                range(8)
+            ))
+
+        assert _SlowQuoteContext.overlaps == 0
+        assert prices.count((None, None)) == 1
+        assert prices.count((1.5, 100)) == 7
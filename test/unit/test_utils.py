@@ -10,11 +10,18 @@ from pathlib import Path
 # Ensure src is in path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
+import re
+
+import utils
 from utils import (
+    print_asset_summary,
     is_option_contract,
+    _is_occ_format,
     _identify_hk_option,
     get_option_multiplier,
     calculate_position_value,
+    calculate_position_value_batch,
+    resolve_position_multiplier,
     is_money_market_fund
 )
 
@@ -47,6 +54,17 @@ class TestOptionDetection:
         assert is_option_contract("SBET260116P25000", None) is True
         assert is_option_contract("AAPL251219C150000", None) is True
     
+    def test_is_occ_format_matches_regex(self):
+        """Slice-based OCC check agrees with the reference regex"""
+        occ_re = re.compile(r'^[A-Z]{1,4}\d{6}[CP]\d+$')
+        samples = [
+            "SBET260116P25000", "AAPL251219C150000", "F260116C1", "ABCDE260116C1",
+            "AAPL251219X150000", "AAPL25121C150000", "AAPL251219C", "251219C150000",
+            "aapl251219c150000", "AAPL 251219C150000", "AAPL251219C15000A", "",
+        ]
+        for code in samples:
+            assert _is_occ_format(code) == bool(occ_re.match(code)), code
+    
     def test_is_option_contract_regular_stock(self):
         """Regular stocks should not be detected as options"""
         assert is_option_contract("AAPL", None) is False
@@ -189,6 +207,24 @@ class TestPositionValueCalculation:
         )
         assert value == 0.0
         assert multiplier == 1
+    
+    def test_calculate_position_value_batch_matches_scalar(self):
+        """Batch valuation agrees with the per-position calculation"""
+        cases = [
+            (150.0, 100, "AAPL", None, None),
+            (5.50, 10, "AAPL 250117C00150000", None, None),
+            (10.00, 20, "TCH", "TCH 250328 400.00 CALL", 500),
+            (0, 100, "AAPL", None, None),
+            (-2.0, 100, "AAPL", None, None),
+        ]
+        expected = [calculate_position_value(*case)[0] for case in cases]
+        
+        values = calculate_position_value_batch(
+            [c[0] for c in cases],
+            [c[1] for c in cases],
+            [resolve_position_multiplier(*c[2:]) for c in cases],
+        )
+        assert values.tolist() == expected
 
 
 class TestMMFDetection:
@@ -223,3 +259,32 @@ class TestMMFDetection:
         """Handle empty string"""
         assert is_money_market_fund("") is False
 
+    
+    def test_resolve_position_multiplier_mmf(self):
+        """MMF units are valued with multiplier 1 even if the name reads like an option"""
+        assert resolve_position_multiplier("CSOPMMF", "CSOP USD Money Market Fund PUT") == 1
+        assert resolve_position_multiplier("CSOPMMF", "CSOP USD Money Market Fund PUT", 10) == 10
+
+
+class TestAssetSummary:
+    """Test the printed cross-broker asset summary"""
+    
+    def test_legacy_rows_without_currency(self, monkeypatch, capsys):
+        """None/NaN price currencies are reported unconverted instead of crashing"""
+        def _fail_rate(from_currency, to_currency, date=None):
+            raise ValueError(f"no rate for {from_currency}")
+        
+        monkeypatch.setattr(utils.exchange_handler, "get_rate_lazy", _fail_rate)
+        from src.broker_processor import ProcessedResult
+        
+        positions = [
+            {'StockCode': 'AAA', 'Holding': 10, 'FinalPrice': 2.0, 'PriceCurrency': None},
+            {'StockCode': 'BBB', 'Holding': 5, 'FinalPrice': 3.0, 'PriceCurrency': float('nan')},
+        ]
+        result = ProcessedResult(broker_name="HTI", account_id="DEFAULT", cash_data={}, positions=positions)
+        
+        print_asset_summary([result], "2025-07-18")
+        
+        output = capsys.readouterr().out
+        assert "2.00 None (No USD Conversion, N/A) [$20.00]" in output
+        assert "3.00 nan (No USD Conversion, N/A) [$15.00]" in output